@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+
+import time
+from enviroplus.noise import Noise
+from enviroplus.spl import SPLMeter
+
+print("""noise-level.py - Measure A-weighted sound pressure level.
+
+This example streams audio continuously and prints the current level once a second,
+and the Leq, Lmax, L10 and L90 statistics at the end of every minute.
+
+Set CALIBRATION_OFFSET to the value returned by SPLMeter.calibrate() while your
+microphone hears a 94dB calibrator, or levels will be relative to full scale.
+
+Press Ctrl+C to exit!
+
+""")
+
+CALIBRATION_OFFSET = 0.0
+
+noise = Noise(stream=True)
+meter = SPLMeter(noise, weighting='A', period=60.0, calibration_offset=CALIBRATION_OFFSET)
+
+while True:
+    time.sleep(1.0)
+    for levels in meter.update():
+        print(levels)
+    print("Level: {:05.02f} dBA".format(meter.get_level()))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Benchmark enviroplus.noise analysis throughput without a microphone.
+
+Audio is replayed from a synthetic source, or a WAV file with --wav, as fast as
+the analysis allows, so results measure analysis cost rather than capture time.
+
+Usage, from the library directory:
+
+    python3 benchmarks/benchmark_noise.py
+    python3 benchmarks/benchmark_noise.py --sample-rates 16000 --durations 0.5 --json before.json
+    python3 benchmarks/benchmark_noise.py --sample-rates 16000 --durations 0.5 --baseline before.json
+
+"""
+
+import argparse
+import functools
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from enviroplus.audio import SyntheticSource, WavFileSource  # noqa: E402
+from enviroplus.noise import Noise  # noqa: E402
+from enviroplus.spl import SPLMeter  # noqa: E402
+
+import harness  # noqa: E402
+
+
+def make_source(sample_rate, wav):
+    if wav:
+        return WavFileSource(wav, loop=True)
+    return SyntheticSource(sample_rate=sample_rate, tones=((250.0, 0.2), (1000.0, 0.1), (4000.0, 0.05)), noise=0.05, seed=0)
+
+
+def make_bands(count, sample_rate):
+    """Return `count` contiguous, logarithmically spaced bands from 50Hz to 90% of Nyquist."""
+    low = 50.0
+    high = sample_rate * 0.45
+    ratio = (high / low) ** (1.0 / count)
+    return [(int(low * ratio ** n), int(low * ratio ** (n + 1))) for n in range(count)]
+
+
+def setup_profile(sample_rate, duration, wav, **options):
+    noise = Noise(sample_rate=sample_rate, duration=duration, source=make_source(sample_rate, wav), **options)
+    return noise.get_noise_profile
+
+
+def setup_bands(sample_rate, duration, wav, count):
+    noise = Noise(sample_rate=sample_rate, duration=duration, source=make_source(sample_rate, wav))
+    return functools.partial(noise.get_amplitudes_at_frequency_ranges, make_bands(count, sample_rate))
+
+
+def setup_spectrum(sample_rate, duration, wav, count):
+    noise = Noise(sample_rate=sample_rate, duration=duration, source=make_source(sample_rate, wav))
+    spectrum = noise.capture_spectrum()
+    views = [make_bands(n, sample_rate) for n in (3, 10, 30, 60, 120, count)]
+
+    def capture():
+        noise.capture_spectrum(out=spectrum)
+        for bands in views:
+            spectrum.get_amplitudes_at_frequency_ranges(bands)
+
+    return capture
+
+
+def setup_spl(sample_rate, duration, wav):
+    noise = Noise(sample_rate=sample_rate, duration=duration, source=make_source(sample_rate, wav))
+    return SPLMeter(noise).update
+
+
+def configurations(args):
+    for sample_rate in args.sample_rates:
+        for duration in args.durations:
+            common = dict(sample_rate=sample_rate, duration=duration, wav=args.wav)
+            name = "sr={} d={}".format(sample_rate, duration)
+            yield "profile " + name, functools.partial(setup_profile, **common)
+            yield "profile fft=sample_rate " + name, functools.partial(setup_profile, fft_size=sample_rate, **common)
+            yield "profile welch=512 " + name, functools.partial(setup_profile, segment_size=min(512, int(sample_rate * duration)), **common)
+            for count in args.bands:
+                yield "bands={} ".format(count) + name, functools.partial(setup_bands, count=count, **common)
+            yield "spectrum 6 views " + name, functools.partial(setup_spectrum, count=max(args.bands), **common)
+            yield "spl " + name, functools.partial(setup_spl, **common)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sample-rates', type=lambda s: [int(n) for n in s.split(',')], default=[16000, 48000])
+    parser.add_argument('--durations', type=lambda s: [float(n) for n in s.split(',')], default=[0.1, 0.5, 1.0])
+    parser.add_argument('--bands', type=lambda s: [int(n) for n in s.split(',')], default=[3, 30, 240])
+    parser.add_argument('--wav', help='Replay this WAV file instead of a synthetic signal')
+    harness.add_arguments(parser)
+    args = parser.parse_args()
+
+    if args.wav:
+        args.sample_rates = [WavFileSource(args.wav).sample_rate]
+
+    results = []
+    for name, setup in configurations(args):
+        results.append((name, harness.measure(setup, seconds=args.seconds)))
+
+    return harness.finish(results, args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
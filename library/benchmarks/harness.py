@@ -0,0 +1,118 @@
+"""Shared timing, allocation and memory measurement for the enviroplus benchmarks"""
+
+import json
+import multiprocessing
+import resource
+import sys
+import time
+import tracemalloc
+
+
+def measure(setup, seconds=2.0, allocation_calls=5):
+    """Measure one benchmark configuration in a fresh process.
+
+    Returns a dict of calls per second, transient and retained allocations per
+    call, and the peak RSS of the process running only this configuration.
+
+    :param setup: Picklable callable returning the function to benchmark
+    :param seconds: Minimum time to spend calling the function
+    :param allocation_calls: Calls traced with tracemalloc, after timing
+
+    """
+    parent, child = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run, args=(child, setup, seconds, allocation_calls))
+    process.start()
+    result = parent.recv()
+    process.join()
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+def _run(pipe, setup, seconds, allocation_calls):
+    try:
+        func = setup()
+        func()
+
+        calls = 0
+        start = time.perf_counter()
+        elapsed = 0.0
+        while elapsed < seconds:
+            func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        for _ in range(allocation_calls):
+            func()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        pipe.send({
+            'calls_per_second': calls / elapsed,
+            'peak_allocated_kb': peak / 1024.0,
+            'retained_kb_per_call': current / 1024.0 / allocation_calls,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+        })
+    except Exception as e:
+        pipe.send(e)
+
+
+def report(results, name_width=48):
+    """Print results as a table, one row per configuration."""
+    print("{:<{width}} {:>10} {:>12} {:>12} {:>9}".format(
+        "configuration", "calls/s", "alloc KB", "retained KB", "RSS MB", width=name_width))
+    for name, result in results:
+        print("{:<{width}} {calls_per_second:>10.1f} {peak_allocated_kb:>12.1f} {retained_kb_per_call:>12.2f} {peak_rss_mb:>9.1f}".format(
+            name, width=name_width, **result))
+
+
+def check_baseline(results, baseline_file, tolerance):
+    """Compare calls per second against a saved run, return names that regressed.
+
+    :param results: List of (name, result) pairs
+    :param baseline_file: JSON file written by save() from an earlier run
+    :param tolerance: Allowed slowdown as a fraction, eg: 0.1 for 10%
+
+    """
+    with open(baseline_file) as f:
+        baseline = json.load(f)
+
+    regressions = []
+    for name, result in results:
+        if name not in baseline:
+            continue
+        expected = baseline[name]['calls_per_second']
+        if result['calls_per_second'] < expected * (1.0 - tolerance):
+            print("REGRESSION {}: {:.1f} calls/s, baseline {:.1f}".format(name, result['calls_per_second'], expected), file=sys.stderr)
+            regressions.append(name)
+    return regressions
+
+
+def save(results, filename):
+    """Save results as JSON, for use as a later baseline."""
+    with open(filename, 'w') as f:
+        json.dump(dict(results), f, indent=2, sort_keys=True)
+
+
+def add_arguments(parser):
+    """Add the options shared by every benchmark script."""
+    parser.add_argument('--seconds', type=float, default=2.0, help='Minimum time to run each configuration')
+    parser.add_argument('--json', help='Save results to this file')
+    parser.add_argument('--baseline', help='Fail if any configuration is slower than in this saved results file')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed slowdown against --baseline, as a fraction')
+
+
+def finish(results, args):
+    """Report results, save them and compare them with a baseline as requested by args.
+
+    Returns the process exit status.
+
+    """
+    report(results)
+    if args.json:
+        save(results, args.json)
+    if args.baseline and check_baseline(results, args.baseline, args.tolerance):
+        return 1
+    return 0
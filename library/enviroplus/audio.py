@@ -0,0 +1,216 @@
+"""Audio sources for enviroplus.noise"""
+
+import struct
+import threading
+import time
+import numpy
+
+# sounddevice fails to import without PortAudio, which replay sources don't need
+try:
+    import sounddevice
+except (ImportError, OSError):
+    sounddevice = None
+
+
+class AudioSource(object):
+    """Base class for audio sources used by Noise.
+
+    A source fills preallocated (frames, 1) arrays with mono audio. Sources that
+    can only be read on demand are streamed from a background thread.
+
+    """
+
+    # Fixed sample rate in Hz, or None if the source records at any requested rate
+    sample_rate = None
+
+    # Pace streaming to the sample rate, rather than delivering blocks as fast as possible
+    realtime = True
+
+    def record(self, out, sample_rate):
+        """Fill `out` with the next frames of audio, blocking until they are available.
+
+        :param out: Array of shape (frames, 1) to fill
+        :param sample_rate: Sample rate in Hz
+
+        """
+        raise NotImplementedError
+
+    def start(self, callback, sample_rate, dtype, blocksize=1024):
+        """Start streaming blocks of audio to callback(indata, frames, time, status).
+
+        :param callback: Called from a background thread with each block
+        :param sample_rate: Sample rate in Hz
+        :param dtype: Sample format of each block
+        :param blocksize: Frames in each block
+
+        """
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(callback, sample_rate, dtype, blocksize))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop streaming."""
+        self._stop_event.set()
+        self._thread.join()
+
+    def _run(self, callback, sample_rate, dtype, blocksize):
+        block = numpy.zeros((blocksize, 1), dtype=dtype)
+        deadline = time.time()
+        while not self._stop_event.is_set():
+            try:
+                self.record(block, sample_rate)
+            except EOFError:
+                return
+            callback(block, blocksize, None, None)
+            if self.realtime:
+                deadline += float(blocksize) / sample_rate
+                self._stop_event.wait(max(0, deadline - time.time()))
+
+
+class SoundDeviceSource(AudioSource):
+    def __init__(self):
+        """Record from the default input device with sounddevice."""
+        if sounddevice is None:
+            raise ImportError("sounddevice and PortAudio are required to record from a microphone")
+        self._stream = None
+
+    def record(self, out, sample_rate):
+        return sounddevice.rec(
+            samplerate=sample_rate,
+            blocking=True,
+            out=out
+        )
+
+    def start(self, callback, sample_rate, dtype, blocksize=0):
+        self._stream = sounddevice.InputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype=dtype,
+            callback=callback
+        )
+        self._stream.start()
+
+    def stop(self):
+        self._stream.stop()
+        self._stream.close()
+        self._stream = None
+
+
+class WavFileSource(AudioSource):
+    def __init__(self, path, loop=False, realtime=True):
+        """Replay a WAV file, memory-mapped so long recordings are not loaded into RAM.
+
+        Supports 8, 16 and 32 bit integer PCM and 32 or 64 bit float files. Only
+        the first channel is used. Reads return as soon as the data is copied,
+        so replay runs as fast as the analysis allows.
+
+        :param path: Path to the WAV file
+        :param loop: Start again from the beginning at the end of the file, otherwise raise EOFError
+        :param realtime: When streaming, deliver blocks at the file's sample rate
+
+        """
+        self.path = path
+        self.loop = loop
+        self.realtime = realtime
+
+        fmt, offset, size = self._read_header(path)
+        audio_format, channels, self.sample_rate, bits = fmt
+        dtype = {
+            (1, 8): 'uint8',
+            (1, 16): '<i2',
+            (1, 32): '<i4',
+            (3, 32): '<f4',
+            (3, 64): '<f8'
+        }.get((audio_format, bits))
+        if dtype is None:
+            raise ValueError("Unsupported WAV format {} with {} bits per sample".format(audio_format, bits))
+
+        frames = size // (channels * bits // 8)
+        self._data = numpy.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(frames, channels))
+        self.frames = frames
+        self.position = 0
+
+        # Scale integer PCM to +-1.0
+        self._zero = 128.0 if dtype == 'uint8' else 0.0
+        self._scale = 1.0 if audio_format == 3 else float(2 ** (bits - 1))
+
+    def record(self, out, sample_rate):
+        frames = len(out)
+        written = 0
+        while written < frames:
+            if self.position == self.frames:
+                if not self.loop:
+                    raise EOFError("End of {}".format(self.path))
+                self.position = 0
+            count = min(frames - written, self.frames - self.position)
+            samples = self._data[self.position:self.position + count, 0]
+            _write(out[written:written + count, 0], (samples - self._zero) / self._scale)
+            self.position += count
+            written += count
+        return out
+
+    @staticmethod
+    def _read_header(path):
+        fmt = None
+        with open(path, 'rb') as f:
+            riff, _, wave = struct.unpack('<4sI4s', f.read(12))
+            if riff != b'RIFF' or wave != b'WAVE':
+                raise ValueError("{} is not a WAV file".format(path))
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    raise ValueError("{} has no audio data".format(path))
+                chunk, size = struct.unpack('<4sI', header)
+                if chunk == b'data':
+                    if fmt is None:
+                        raise ValueError("{} has no format chunk".format(path))
+                    return fmt, f.tell(), size
+                data = f.read(size + (size % 2))
+                if chunk == b'fmt ':
+                    audio_format, channels, sample_rate, _, _, bits = struct.unpack('<HHIIHH', data[:16])
+                    # WAVE_FORMAT_EXTENSIBLE carries the real format at the start of its sub-format GUID
+                    if audio_format == 0xFFFE:
+                        audio_format, = struct.unpack('<H', data[24:26])
+                    fmt = audio_format, channels, sample_rate, bits
+
+
+class SyntheticSource(AudioSource):
+    def __init__(self, sample_rate=16000, tones=((1000.0, 0.5),), noise=0.0, seed=None, realtime=True):
+        """Generate sine tones mixed with white noise.
+
+        Tones keep their phase from one read to the next, so consecutive reads
+        form one continuous signal.
+
+        :param sample_rate: Sample rate in Hz
+        :param tones: List of (frequency in Hz, amplitude) pairs
+        :param noise: Standard deviation of added white noise
+        :param seed: Optional random seed, for repeatable noise
+        :param realtime: When streaming, deliver blocks at the sample rate
+
+        """
+        self.sample_rate = sample_rate
+        self.tones = tuple(tones)
+        self.noise = noise
+        self.realtime = realtime
+        self.position = 0
+        self._random = numpy.random.RandomState(seed)
+
+    def record(self, out, sample_rate):
+        frames = len(out)
+        t = (self.position + numpy.arange(frames)) / float(self.sample_rate)
+        signal = numpy.zeros(frames)
+        for frequency, amplitude in self.tones:
+            signal += amplitude * numpy.sin(2 * numpy.pi * frequency * t)
+        if self.noise:
+            signal += self._random.normal(0.0, self.noise, frames)
+        _write(out[:, 0], signal)
+        self.position += frames
+        return out
+
+
+def _write(out, samples):
+    # Store +-1.0 samples into float or int16 capture buffers
+    if out.dtype.kind in 'iu':
+        samples = numpy.clip(samples * 32768.0, -32768, 32767)
+    out[:] = samples
@@ -1,32 +1,68 @@
 """Read the MICS6814 via an ads1015 ADC"""
 
+import math
 import time
+import array
 import atexit
+import threading
+import collections
 import ads1015
-import RPi.GPIO as GPIO
+
+# RPi.GPIO is only available on a Pi, simulated sensors run without it
+try:
+    import RPi.GPIO as GPIO
+except ImportError:
+    GPIO = None
 
 MICS6814_HEATER_PIN = 24
 MICS6814_GAIN = 6.144
+MICS6814_SAMPLE_RATE = 1600
+
+# Conversion periods to wait after switching the programmable gain
+ADC_SETTLE_CONVERSIONS = 2
+
+# Seconds after the heater turns on before readings settle
+MICS6814_WARMUP_TIME = 600.0
+
+STATE_OFF = 'off'
+STATE_WARMING_UP = 'warming-up'
+STATE_STABLE = 'stable'
 
 ads1015.I2C_ADDRESS_DEFAULT = ads1015.I2C_ADDRESS_ALTERNATE
 _is_setup = False
-_adc_enabled = False
-_adc_gain = 6.148
+
+# Mics6814 used by the module level functions, created by setup()
+_default = None
+
+# ADC input for each sensor channel, the spare ADC is read from 'ref/gnd'
+_CHANNELS = {
+    'oxidising': 'in0/gnd',
+    'reducing': 'in1/gnd',
+    'nh3': 'in2/gnd'
+}
 
 
 class Mics6814Reading(object):
-    __slots__ = 'oxidising', 'reducing', 'nh3', 'adc'
+    __slots__ = 'oxidising', 'reducing', 'nh3', 'adc', 'timestamp', 'heater_time'
 
-    def __init__(self, ox, red, nh3, adc=None):
+    def __init__(self, ox, red, nh3, adc=None, timestamp=None, heater_time=None):
         self.oxidising = ox
         self.reducing = red
         self.nh3 = nh3
         self.adc = adc
+        self.timestamp = timestamp
+        self.heater_time = heater_time
 
     def __repr__(self):
-        fmt = """Oxidising: {ox:05.02f} Ohms
-Reducing: {red:05.02f} Ohms
-NH3: {nh3:05.02f} Ohms"""
+        # Channels left out of a partial read() are None
+        lines = []
+        if self.oxidising is not None:
+            lines.append("Oxidising: {ox:05.02f} Ohms")
+        if self.reducing is not None:
+            lines.append("Reducing: {red:05.02f} Ohms")
+        if self.nh3 is not None:
+            lines.append("NH3: {nh3:05.02f} Ohms")
+        fmt = "\n".join(lines)
         if self.adc is not None:
             fmt += """
 ADC: {adc:05.02f} Volts
@@ -40,74 +76,630 @@ ADC: {adc:05.02f} Volts
     __str__ = __repr__
 
 
-def setup():
-    global adc, _is_setup
+class Mics6814Batch(object):
+    __slots__ = 'timestamp', 'oxidising', 'reducing', 'nh3', 'adc', 'heater_time'
+
+    def __init__(self, timestamp=(), ox=(), red=(), nh3=(), adc=(), heater_time=()):
+        """Timestamped gas readings stored as columns of doubles.
+
+        Each column is an array.array('d'), eight bytes per value rather than a
+        Python object per reading, and supports the buffer protocol so that
+        numpy.asarray(batch.nh3) is a view of it without copying.
+
+        A missing spare ADC value or heater time is stored as NaN.
+
+        """
+        self.timestamp = array.array('d', timestamp)
+        self.oxidising = array.array('d', ox)
+        self.reducing = array.array('d', red)
+        self.nh3 = array.array('d', nh3)
+        self.adc = array.array('d', adc)
+        self.heater_time = array.array('d', heater_time)
+
+    @classmethod
+    def from_readings(cls, readings):
+        """Return a batch holding a sequence of Mics6814Reading."""
+        batch = cls()
+        for reading in readings:
+            batch.append(reading)
+        return batch
+
+    def append(self, reading):
+        """Add a Mics6814Reading to the end of the batch."""
+        self.timestamp.append(reading.timestamp if reading.timestamp is not None else float('nan'))
+        self.oxidising.append(reading.oxidising)
+        self.reducing.append(reading.reducing)
+        self.nh3.append(reading.nh3)
+        self.adc.append(reading.adc if reading.adc is not None else float('nan'))
+        self.heater_time.append(reading.heater_time if reading.heater_time is not None else float('nan'))
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Mics6814Batch(
+                self.timestamp[index],
+                self.oxidising[index],
+                self.reducing[index],
+                self.nh3[index],
+                self.adc[index],
+                self.heater_time[index])
+
+        adc = self.adc[index]
+        heater_time = self.heater_time[index]
+        return Mics6814Reading(
+            self.oxidising[index],
+            self.reducing[index],
+            self.nh3[index],
+            None if math.isnan(adc) else adc,
+            timestamp=self.timestamp[index],
+            heater_time=None if math.isnan(heater_time) else heater_time)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        if len(self) == 0:
+            return "Mics6814Batch: 0 readings"
+        return "Mics6814Batch: {count} readings from {start} to {end}".format(
+            count=len(self),
+            start=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.timestamp[0])),
+            end=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.timestamp[-1])))
+
+    __str__ = __repr__
+
+
+class Mics6814Statistics(object):
+    __slots__ = 'mean', 'median', 'stddev', 'samples'
+
+    def __init__(self, mean, median, stddev, samples):
+        self.mean = mean
+        self.median = median
+        self.stddev = stddev
+        self.samples = samples
+
+    def __repr__(self):
+        return """Mean ({samples} samples):
+{mean}
+Median:
+{median}
+Standard deviation:
+{stddev}""".format(
+            samples=self.samples,
+            mean=self.mean,
+            median=self.median,
+            stddev=self.stddev)
+
+    __str__ = __repr__
+
+
+class Mics6814():
+    def __init__(self, i2c_addr=0x49, heater_pin=MICS6814_HEATER_PIN, i2c_dev=None, adc=None):
+        """MICS6814 gas sensor read through an ADS1015 ADC.
+
+        Each instance owns its ADC and heater pin, so several boards can be
+        read from one process, and a lock, so one instance can be shared by
+        threads. The module level functions use a default instance created
+        by setup().
+
+        :param i2c_addr: I2C address of the ADS1015
+        :param heater_pin: BCM pin driving the sensor heater, or None if it is not switched
+        :param i2c_dev: Optional SMBus instance for the ADS1015
+        :param adc: Optional ADC to use instead of an ADS1015 at i2c_addr, eg: enviroplus.gassimulator.SimulatedADS1015
+
+        """
+        if heater_pin is not None and GPIO is None:
+            raise ImportError("RPi.GPIO is required to switch the heater, use heater_pin=None without it")
+
+        self.heater_pin = heater_pin
+
+        # Reentrant, so locked methods can call each other
+        self._lock = threading.RLock()
+
+        self._adc_enabled = False
+        self._adc_gain = 6.148
+        self._adc_interval = 1
+        self._adc_samples = 1
+        self._adc_cycle = 0
+        self._adc_last = None
+
+        self._sampler = None
+        self._latest = None
+        self._history = collections.deque(maxlen=1)
+
+        if adc is None:
+            adc = ads1015.ADS1015(i2c_addr=i2c_addr, i2c_dev=i2c_dev)
+        self.adc = adc
+        self.adc.set_mode('single')
+        self.adc.set_programmable_gain(MICS6814_GAIN)
+        self.adc.set_sample_rate(MICS6814_SAMPLE_RATE)
+
+        if heater_pin is not None:
+            GPIO.setwarnings(False)
+            GPIO.setmode(GPIO.BCM)
+            GPIO.setup(heater_pin, GPIO.OUT)
+            GPIO.output(heater_pin, 1)
+        self._heater_on = time.time()
+        atexit.register(self.cleanup)
+
+    def enable_adc(self, value=True):
+        """Enable reading from the additional ADC pin."""
+        self._adc_enabled = value
+
+    def set_adc_gain(self, value):
+        """Set gain value for the additional ADC pin."""
+        with self._lock:
+            self._adc_gain = value
+            self._adc_last = None
+
+    def set_adc_schedule(self, interval=1, samples=1):
+        """Set how often read_all() reads the additional ADC pin.
+
+        When the ADC gain differs from MICS6814_GAIN, every read of the pin
+        switches the gain and back again. Reading it every `interval` calls,
+        with `samples` conversions in one burst at its own gain, keeps that
+        cost off most read_all() calls. In between, read_all() reports the
+        last value read.
+
+        :param interval: Read the pin on every Nth call to read_all()
+        :param samples: Conversions to average each time the pin is read
+
+        """
+        if interval < 1 or samples < 1:
+            raise ValueError("interval and samples must be at least 1")
+        with self._lock:
+            self._adc_interval = interval
+            self._adc_samples = samples
+            self._adc_cycle = 0
+
+    def cleanup(self):
+        """Switch the heater off."""
+        self.set_heater(False)
+
+    def set_heater(self, value):
+        """Switch the MICS6814 heater on or off.
+
+        Switching the heater off lets the sensor cool, so readings need a fresh
+        warm-up once it is back on.
+
+        :param value: True to switch the heater on
+
+        """
+        with self._lock:
+            if value:
+                if self._heater_on is None:
+                    self._output_heater(1)
+                    self._heater_on = time.time()
+            else:
+                self._output_heater(0)
+                self._heater_on = None
+
+    def _output_heater(self, value):
+        if self.heater_pin is not None:
+            GPIO.output(self.heater_pin, value)
+
+    def duty_cycle(self, interval, heater_time=60.0, samples=16, count=None):
+        """Yield readings every `interval` seconds, heating the sensor only before each.
+
+        The heater is switched on `heater_time` seconds before each reading and
+        off again as soon as it is taken, cutting heater energy to around
+        heater_time / interval of continuous running. Each reading's heater_time
+        reports the warm-up it actually had.
+
+        Readings are absolute resistances after a short warm-up, so they are
+        comparable with each other but not with a continuously heated sensor.
+
+        :param interval: Seconds between readings
+        :param heater_time: Seconds to heat the sensor before each reading
+        :param samples: Conversions to average per channel in each reading
+        :param count: Number of readings, or None to run forever
+
+        """
+        if heater_time > interval:
+            raise ValueError("heater_time must not be longer than interval")
+
+        read_at = time.time() + heater_time
+        taken = 0
+        while count is None or taken < count:
+            delay = read_at - heater_time - time.time()
+            if delay > 0:
+                self.set_heater(False)
+                time.sleep(delay)
+            self.set_heater(True)
+
+            delay = read_at - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            reading = self.read_all(samples)
+            if heater_time < interval:
+                self.set_heater(False)
+
+            yield reading
+            taken += 1
+            read_at = max(read_at + interval, time.time() + heater_time)
+
+    def get_heater_time(self):
+        """Return seconds since the heater was switched on, or None if it is off."""
+        heater_on = self._heater_on
+        if heater_on is None:
+            return None
+        return time.time() - heater_on
+
+    def get_state(self, warmup_time=MICS6814_WARMUP_TIME):
+        """Return the sensor state: STATE_OFF, STATE_WARMING_UP or STATE_STABLE.
+
+        Readings taken while warming up drift towards their settled value and
+        should be discarded or flagged, see Mics6814Reading.heater_time.
+
+        :param warmup_time: Seconds the heater must have been on for readings to be stable
+
+        """
+        heater_time = self.get_heater_time()
+        if heater_time is None:
+            return STATE_OFF
+        if heater_time < warmup_time:
+            return STATE_WARMING_UP
+        return STATE_STABLE
+
+    def read_all(self, samples=1, window=None):
+        """Return gas resistence for oxidising, reducing and NH3
+
+        While the background sampler is running, returns its latest reading
+        immediately, or the mean of its readings over the last `window` seconds.
+
+        :param samples: Conversions to average per channel, see read_statistics()
+        :param window: With the sampler running, average readings from this many seconds before the latest
+
+        """
+        if self._sampler is not None:
+            return self._cached(window)
+        return self._read_all(samples)
+
+    def _read_all(self, samples):
+        with self._lock:
+            reading = self.read(('oxidising', 'reducing', 'nh3'), samples)
+
+            if self._adc_enabled:
+                if self._adc_last is None or self._adc_cycle % self._adc_interval == 0:
+                    self._adc_last = self._read_channel('adc', max(samples, self._adc_samples))
+                self._adc_cycle += 1
+                reading.adc = self._adc_last
+
+        return reading
+
+    def read(self, channels=('oxidising', 'reducing', 'nh3'), samples=1):
+        """Return gas resistance for only the requested channels.
+
+        Only the requested channels are converted, the rest of the returned
+        Mics6814Reading is None. The spare ADC is read when requested, whether
+        or not enable_adc() is on.
+
+        :param channels: Any of 'oxidising', 'reducing', 'nh3' and 'adc'
+        :param samples: Conversions to average per channel, see read_statistics()
+
+        """
+        for channel in channels:
+            if channel != 'adc' and channel not in _CHANNELS:
+                raise ValueError("Invalid channel {}, must be one of oxidising, reducing, nh3 or adc".format(channel))
+
+        values = {}
+        with self._lock:
+            for channel in channels:
+                values[channel] = self._read_channel(channel, samples)
+
+        return Mics6814Reading(
+            values.get('oxidising'),
+            values.get('reducing'),
+            values.get('nh3'),
+            values.get('adc'),
+            timestamp=time.time(),
+            heater_time=self.get_heater_time())
+
+    def read_batch(self, count, interval=1.0, samples=1):
+        """Return a Mics6814Batch of `count` readings taken `interval` seconds apart.
+
+        :param count: Number of readings
+        :param interval: Seconds between the start of each reading
+        :param samples: Conversions to average per channel in each reading
+
+        """
+        batch = Mics6814Batch()
+        deadline = time.time()
+        for index in range(count):
+            if index > 0:
+                deadline += interval
+                delay = deadline - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            batch.append(self.read_all(samples))
+        return batch
+
+    def read_statistics(self, samples=16):
+        """Return the mean, median and standard deviation of oversampled gas readings.
+
+        Each channel is converted `samples` times in one burst, with the ADC
+        running continuously at MICS6814_SAMPLE_RATE, so 16 samples of every
+        channel take around 40ms and far less I2C traffic than 16 calls to read_all().
+
+        :param samples: Conversions per channel
+
+        """
+        if samples < 1:
+            raise ValueError("samples must be at least 1")
+
+        with self._lock:
+            ox = [_to_resistance(v) for v in self._burst(_CHANNELS['oxidising'], MICS6814_GAIN, samples)]
+            red = [_to_resistance(v) for v in self._burst(_CHANNELS['reducing'], MICS6814_GAIN, samples)]
+            nh3 = [_to_resistance(v) for v in self._burst(_CHANNELS['nh3'], MICS6814_GAIN, samples)]
+            channels = [ox, red, nh3]
+
+            if self._adc_enabled:
+                channels.append(self._burst('ref/gnd', self._adc_gain, samples))
+
+        summaries = [_summarise(values) for values in channels]
+        if not self._adc_enabled:
+            summaries.append((None, None, None))
+
+        return Mics6814Statistics(
+            mean=Mics6814Reading(*[summary[0] for summary in summaries]),
+            median=Mics6814Reading(*[summary[1] for summary in summaries]),
+            stddev=Mics6814Reading(*[summary[2] for summary in summaries]),
+            samples=samples)
+
+    def read_oxidising(self):
+        """Return gas resistance for oxidising gases.
+
+        Eg chlorine, nitrous oxide
+        """
+        if self._sampler is not None:
+            return self._cached().oxidising
+        with self._lock:
+            return self._read_channel('oxidising')
+
+    def read_reducing(self):
+        """Return gas resistance for reducing gases.
+
+        Eg hydrogen, carbon monoxide
+        """
+        if self._sampler is not None:
+            return self._cached().reducing
+        with self._lock:
+            return self._read_channel('reducing')
+
+    def read_nh3(self):
+        """Return gas resistance for nh3/ammonia"""
+        if self._sampler is not None:
+            return self._cached().nh3
+        with self._lock:
+            return self._read_channel('nh3')
+
+    def read_adc(self):
+        """Return spare ADC channel value"""
+        if not self._adc_enabled:
+            return None
+        if self._sampler is not None:
+            return self._cached().adc
+        with self._lock:
+            return self._read_channel('adc')
+
+    def start_sampler(self, rate_hz=10.0, history=600, samples=1):
+        """Start reading the sensor on a background thread.
+
+        Readings are kept in a ring buffer of `history` readings. Until
+        stop_sampler() is called, read_all() and the single channel reads return
+        the latest reading without waiting on the ADC.
+
+        :param rate_hz: Readings per second
+        :param history: Readings kept for read_all(window=...)
+        :param samples: Conversions to average per channel in each reading
+
+        """
+        with self._lock:
+            if self._sampler is not None:
+                raise RuntimeError("Gas sampler is already running")
+
+            self._history = collections.deque(maxlen=history)
+            self._latest = None
+
+            stop = threading.Event()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._sample, args=(1.0 / rate_hz, samples, stop, ready))
+            thread.daemon = True
+            self._sampler = thread, stop, ready
+            thread.start()
+
+    def stop_sampler(self):
+        """Stop the background sampler, reads go directly to the ADC again."""
+        sampler = self._sampler
+        if sampler is None:
+            return
+        thread, stop, _ = sampler
+        stop.set()
+        thread.join()
+        self._sampler = None
+
+    def _sample(self, interval, samples, stop, ready):
+        deadline = time.time()
+        while not stop.is_set():
+            try:
+                reading = self._read_all(samples)
+            except (IOError, OSError):
+                # Skip a failed I2C transfer rather than end sampling
+                pass
+            else:
+                self._history.append(reading)
+                # A single assignment, so readers never see a partial update
+                self._latest = reading
+                ready.set()
+
+            deadline += interval
+            delay = deadline - time.time()
+            if delay < 0:
+                # Fell behind, start the schedule again from now
+                deadline = time.time()
+                delay = 0
+            stop.wait(delay)
+
+    def _cached(self, window=None):
+        self._sampler[2].wait()
+        latest = self._latest
+        if window is None:
+            return latest
+
+        start = latest.timestamp - window
+        readings = [reading for reading in list(self._history) if reading.timestamp >= start]
+        values = []
+        for field in Mics6814Reading.__slots__[:4]:
+            column = [getattr(reading, field) for reading in readings]
+            if None in column:
+                values.append(None)
+            else:
+                values.append(sum(column) / float(len(column)))
+        return Mics6814Reading(*values, timestamp=latest.timestamp, heater_time=latest.heater_time)
+
+    def _read_channel(self, channel, samples=1):
+        if channel == 'adc':
+            if samples > 1:
+                return _summarise(self._burst('ref/gnd', self._adc_gain, samples))[0]
+            return self._read_adc_voltage()
+
+        if samples > 1:
+            return _summarise([_to_resistance(v) for v in self._burst(_CHANNELS[channel], MICS6814_GAIN, samples)])[0]
+        return _to_resistance(self.adc.get_voltage(_CHANNELS[channel]))
+
+    def _read_adc_voltage(self):
+        if self._adc_gain == MICS6814_GAIN:
+            return self.adc.get_voltage('ref/gnd')
+
+        self.adc.set_programmable_gain(self._adc_gain)
+        time.sleep(ADC_SETTLE_CONVERSIONS / float(MICS6814_SAMPLE_RATE))
+        analog = self.adc.get_voltage('ref/gnd')
+        self.adc.set_programmable_gain(MICS6814_GAIN)
+        return analog
+
+    def _burst(self, channel, gain, samples):
+        # Read back to back conversions of one channel in continuous mode.
+        # Single-shot reads cost a config write and status polling per conversion,
+        # continuous mode needs only one read of the conversion register each.
+        period = 1.0 / MICS6814_SAMPLE_RATE
+        self.adc.set_multiplexer(channel)
+        if gain != MICS6814_GAIN:
+            self.adc.set_programmable_gain(gain)
+        self.adc.set_mode('continuous')
+
+        voltages = []
+        try:
+            # Skip the conversion in progress when the channel or gain was switched
+            deadline = time.time() + ADC_SETTLE_CONVERSIONS * period
+            for _ in range(samples):
+                delay = deadline - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+                # 12-bit signed result, full scale is the programmable gain
+                voltages.append(self.adc.get_conversion_value() * gain / 2048.0)
+                deadline += period
+        finally:
+            self.adc.set_mode('single')
+            if gain != MICS6814_GAIN:
+                self.adc.set_programmable_gain(MICS6814_GAIN)
+
+        return voltages
+
+
+def setup(backend=None, heater_pin=MICS6814_HEATER_PIN):
+    """Set up the default sensor used by the module level functions.
+
+    Called automatically with the default arguments. Call it first to read
+    a simulated sensor, eg: setup(backend=SimulatedADS1015(), heater_pin=None).
+
+    :param backend: Optional ADC to use instead of the Enviro+ ADS1015
+    :param heater_pin: BCM pin driving the sensor heater, or None if it is not switched
+
+    """
+    global adc, _is_setup, _default
     if _is_setup:
         return
     _is_setup = True
 
-    adc = ads1015.ADS1015(i2c_addr=0x49)
-    adc.set_mode('single')
-    adc.set_programmable_gain(MICS6814_GAIN)
-    adc.set_sample_rate(1600)
-
-    GPIO.setwarnings(False)
-    GPIO.setmode(GPIO.BCM)
-    GPIO.setup(MICS6814_HEATER_PIN, GPIO.OUT)
-    GPIO.output(MICS6814_HEATER_PIN, 1)
-    atexit.register(cleanup)
+    _default = Mics6814(heater_pin=heater_pin, adc=backend)
+    adc = _default.adc
 
 
 def enable_adc(value=True):
     """Enable reading from the additional ADC pin."""
-    global _adc_enabled
-    _adc_enabled = value
+    setup()
+    _default.enable_adc(value)
 
 
 def set_adc_gain(value):
     """Set gain value for the additional ADC pin."""
-    global _adc_gain
-    _adc_gain = value
+    setup()
+    _default.set_adc_gain(value)
+
+
+def set_adc_schedule(interval=1, samples=1):
+    """Set how often read_all() reads the additional ADC pin, see Mics6814.set_adc_schedule()."""
+    setup()
+    _default.set_adc_schedule(interval, samples)
 
 
 def cleanup():
-    GPIO.output(MICS6814_HEATER_PIN, 0)
+    if _default is None:
+        GPIO.output(MICS6814_HEATER_PIN, 0)
+    else:
+        _default.cleanup()
+
+
+def set_heater(value):
+    """Switch the MICS6814 heater on or off."""
+    setup()
+    _default.set_heater(value)
+
+
+def duty_cycle(interval, heater_time=60.0, samples=16, count=None):
+    """Yield readings every `interval` seconds, heating the sensor only before each, see Mics6814.duty_cycle()."""
+    setup()
+    return _default.duty_cycle(interval, heater_time, samples, count)
+
+
+def get_heater_time():
+    """Return seconds since the heater was switched on, or None if it is off."""
+    if _default is None:
+        return None
+    return _default.get_heater_time()
 
 
-def read_all():
+def get_state(warmup_time=MICS6814_WARMUP_TIME):
+    """Return the sensor state: STATE_OFF, STATE_WARMING_UP or STATE_STABLE."""
+    if _default is None:
+        return STATE_OFF
+    return _default.get_state(warmup_time)
+
+
+def read_all(samples=1, window=None):
     """Return gas resistence for oxidising, reducing and NH3"""
     setup()
-    ox = adc.get_voltage('in0/gnd')
-    red = adc.get_voltage('in1/gnd')
-    nh3 = adc.get_voltage('in2/gnd')
+    return _default.read_all(samples, window)
 
-    try:
-        ox = (ox * 56000) / (3.3 - ox)
-    except ZeroDivisionError:
-        ox = 0
 
-    try:
-        red = (red * 56000) / (3.3 - red)
-    except ZeroDivisionError:
-        red = 0
+def read(channels=('oxidising', 'reducing', 'nh3'), samples=1):
+    """Return gas resistance for only the requested channels, see Mics6814.read()."""
+    setup()
+    return _default.read(channels, samples)
 
-    try:
-        nh3 = (nh3 * 56000) / (3.3 - nh3)
-    except ZeroDivisionError:
-        nh3 = 0
 
-    analog = None
+def read_batch(count, interval=1.0, samples=1):
+    """Return a Mics6814Batch of `count` readings taken `interval` seconds apart."""
+    setup()
+    return _default.read_batch(count, interval, samples)
 
-    if _adc_enabled:
-        if _adc_gain == MICS6814_GAIN:
-            analog = adc.get_voltage('ref/gnd')
-        else:
-            adc.set_programmable_gain(_adc_gain)
-            time.sleep(0.05)
-            analog = adc.get_voltage('ref/gnd')
-            adc.set_programmable_gain(MICS6814_GAIN)
 
-    return Mics6814Reading(ox, red, nh3, analog)
+def read_statistics(samples=16):
+    """Return the mean, median and standard deviation of oversampled gas readings, see Mics6814.read_statistics()."""
+    setup()
+    return _default.read_statistics(samples)
 
 
 def read_oxidising():
@@ -116,7 +708,7 @@ def read_oxidising():
     Eg chlorine, nitrous oxide
     """
     setup()
-    return read_all().oxidising
+    return _default.read_oxidising()
 
 
 def read_reducing():
@@ -125,16 +717,52 @@ def read_reducing():
     Eg hydrogen, carbon monoxide
     """
     setup()
-    return read_all().reducing
+    return _default.read_reducing()
 
 
 def read_nh3():
     """Return gas resistance for nh3/ammonia"""
     setup()
-    return read_all().nh3
+    return _default.read_nh3()
 
 
 def read_adc():
     """Return spare ADC channel value"""
     setup()
-    return read_all().adc
+    return _default.read_adc()
+
+
+def start_sampler(rate_hz=10.0, history=600, samples=1):
+    """Start reading the sensor on a background thread, see Mics6814.start_sampler()."""
+    setup()
+    _default.start_sampler(rate_hz, history, samples)
+
+
+def stop_sampler():
+    """Stop the background sampler, reads go directly to the ADC again."""
+    if _default is not None:
+        _default.stop_sampler()
+
+
+def _to_resistance(voltage):
+    try:
+        return (voltage * 56000) / (3.3 - voltage)
+    except ZeroDivisionError:
+        return 0
+
+
+def _summarise(values):
+    # Mean, median and sample standard deviation
+    count = len(values)
+    mean = sum(values) / float(count)
+    ordered = sorted(values)
+    middle = count // 2
+    if count % 2:
+        median = ordered[middle]
+    else:
+        median = (ordered[middle - 1] + ordered[middle]) / 2.0
+    if count > 1:
+        stddev = math.sqrt(sum((value - mean) ** 2 for value in values) / (count - 1))
+    else:
+        stddev = 0.0
+    return mean, median, stddev
@@ -0,0 +1,215 @@
+"""Vectorised MICS6814 resistance and approximate ppm conversion"""
+
+import json
+import math
+import numpy
+
+# The Enviro+ load resistor and supply, as assumed by enviroplus.gas
+SUPPLY_VOLTAGE = 3.3
+LOAD_RESISTANCE = 56000.0
+
+# Seconds after the heater turns on before readings settle, as enviroplus.gas
+WARMUP_TIME = 600.0
+
+# Approximate ppm = scale * (Rs / R0) ** exponent, power law fits to the
+# MICS6814 datasheet sensitivity curves, keyed by gas: (channel, scale, exponent)
+CURVES = {
+    'co': ('reducing', 4.385, -1.179),
+    'h2': ('reducing', 0.73, -1.8),
+    'ch4': ('reducing', 630.957, -4.363),
+    'ethanol': ('reducing', 1.622, -1.552),
+    'no2': ('oxidising', 1.0 / 6.855, 1.007),
+    'nh3': ('nh3', 1.0 / 1.47, -1.67),
+    'propane': ('nh3', 570.164, -2.518),
+    'butane': ('nh3', 398.107, -2.138)
+}
+
+
+def to_resistance(voltage, supply_voltage=SUPPLY_VOLTAGE, load_resistance=LOAD_RESISTANCE):
+    """Return sensor resistance in Ohms from the voltage across the load resistor.
+
+    A voltage equal to the supply gives 0, as gas.read_all() does.
+
+    :param voltage: Voltage, or array of voltages
+    :param supply_voltage: Sensor supply voltage
+    :param load_resistance: Load resistor in Ohms
+
+    """
+    voltage = numpy.asarray(voltage, dtype='float64')
+    difference = supply_voltage - voltage
+    zero = numpy.equal(difference, 0)
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        resistance = voltage * load_resistance / difference
+    return numpy.where(zero, 0.0, resistance)
+
+
+def to_voltage(resistance, supply_voltage=SUPPLY_VOLTAGE, load_resistance=LOAD_RESISTANCE):
+    """Return the voltage across the load resistor for a sensor resistance.
+
+    The inverse of to_resistance(). Converting stored readings back to volts
+    and then to_resistance() with different parameters corrects historic
+    data recorded with the wrong supply voltage or load resistance.
+
+    :param resistance: Resistance in Ohms, or array of resistances
+    :param supply_voltage: Sensor supply voltage
+    :param load_resistance: Load resistor in Ohms
+
+    """
+    resistance = numpy.asarray(resistance, dtype='float64')
+    return supply_voltage * resistance / (resistance + load_resistance)
+
+
+def to_ppm(gas, ratio):
+    """Return approximate concentration in ppm from the Rs/R0 ratio of its channel.
+
+    These are rough estimates, the datasheet curves are typical of the part
+    and not calibrated to any particular sensor.
+
+    :param gas: A key of CURVES, eg: 'co', 'no2' or 'nh3'
+    :param ratio: Rs/R0, or array of ratios, for the gas's channel
+
+    """
+    if gas not in CURVES:
+        raise ValueError("Unknown gas {}, must be one of {}".format(gas, ', '.join(sorted(CURVES))))
+    _, scale, exponent = CURVES[gas]
+    return scale * numpy.asarray(ratio, dtype='float64') ** exponent
+
+
+class Baseline():
+    def __init__(self, oxidising, reducing, nh3):
+        """Clean air resistance, R0, of each channel of one sensor.
+
+        :param oxidising: R0 of the oxidising channel in Ohms
+        :param reducing: R0 of the reducing channel in Ohms
+        :param nh3: R0 of the NH3 channel in Ohms
+
+        """
+        self.oxidising = float(oxidising)
+        self.reducing = float(reducing)
+        self.nh3 = float(nh3)
+
+    @classmethod
+    def from_readings(cls, readings):
+        """Estimate R0 as the median of readings taken in clean air.
+
+        :param readings: An enviroplus.gas.Mics6814Batch, or anything with oxidising, reducing and nh3 sequences
+
+        """
+        return cls(
+            numpy.median(numpy.asarray(readings.oxidising)),
+            numpy.median(numpy.asarray(readings.reducing)),
+            numpy.median(numpy.asarray(readings.nh3)))
+
+    @classmethod
+    def load(cls, filename, device='default'):
+        """Load the baseline of `device` from a JSON file written by save().
+
+        :param filename: JSON file of baselines keyed by device
+        :param device: Name of the sensor, eg: a hostname or serial number
+
+        """
+        with open(filename) as f:
+            baselines = json.load(f)
+        try:
+            return cls(**baselines[device])
+        except KeyError:
+            raise KeyError("No baseline for device {} in {}".format(device, filename))
+
+    def save(self, filename, device='default'):
+        """Save this baseline for `device`, keeping other devices in the file.
+
+        :param filename: JSON file of baselines keyed by device
+        :param device: Name of the sensor, eg: a hostname or serial number
+
+        """
+        try:
+            with open(filename) as f:
+                baselines = json.load(f)
+        except (IOError, OSError):
+            baselines = {}
+        baselines[device] = {
+            'oxidising': self.oxidising,
+            'reducing': self.reducing,
+            'nh3': self.nh3
+        }
+        with open(filename, 'w') as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+
+    def ratio(self, channel, resistance):
+        """Return Rs/R0 for a channel.
+
+        :param channel: One of 'oxidising', 'reducing' or 'nh3'
+        :param resistance: Resistance in Ohms, or array of resistances
+
+        """
+        return numpy.asarray(resistance, dtype='float64') / getattr(self, channel)
+
+    def ppm(self, readings, gases=None):
+        """Return approximate concentrations, a dict of ppm arrays keyed by gas.
+
+        :param readings: A Mics6814Reading or Mics6814Batch, or anything with oxidising, reducing and nh3 attributes
+        :param gases: Gases to estimate, defaults to every gas in CURVES
+
+        """
+        if gases is None:
+            gases = sorted(CURVES)
+        ratios = {}
+        result = {}
+        for gas in gases:
+            if gas not in CURVES:
+                raise ValueError("Unknown gas {}, must be one of {}".format(gas, ', '.join(sorted(CURVES))))
+            channel = CURVES[gas][0]
+            if channel not in ratios:
+                ratios[channel] = self.ratio(channel, getattr(readings, channel))
+            result[gas] = to_ppm(gas, ratios[channel])
+        return result
+
+    def __repr__(self):
+        return "Baseline(oxidising={}, reducing={}, nh3={})".format(self.oxidising, self.reducing, self.nh3)
+
+
+class BaselineTracker():
+    def __init__(self, time_constant=86400.0, warmup_time=WARMUP_TIME):
+        """Track R0 as an exponentially weighted mean of stable readings.
+
+        The weight of each reading decays with the time since it was taken,
+        so the baseline follows slow sensor drift while short gas events
+        barely move it. Readings taken while the heater is warming up are
+        ignored, which needs readings with heater_time, as returned by
+        enviroplus.gas.
+
+        :param time_constant: Seconds for the weight of a reading to fall to 1/e
+        :param warmup_time: Seconds the heater must have been on before a reading is used
+
+        """
+        self.time_constant = time_constant
+        self.warmup_time = warmup_time
+        self._baseline = None
+        self._timestamp = None
+
+    def update(self, reading):
+        """Add a reading, return True if it was used.
+
+        :param reading: A Mics6814Reading with timestamp and heater_time
+
+        """
+        if reading.heater_time is None or reading.heater_time < self.warmup_time:
+            return False
+
+        values = (reading.oxidising, reading.reducing, reading.nh3)
+        if self._baseline is None:
+            self._baseline = list(values)
+        else:
+            elapsed = max(0.0, reading.timestamp - self._timestamp)
+            weight = 1.0 - math.exp(-elapsed / self.time_constant)
+            for index, value in enumerate(values):
+                self._baseline[index] += weight * (value - self._baseline[index])
+
+        self._timestamp = reading.timestamp
+        return True
+
+    def get_baseline(self):
+        """Return the current Baseline, or None before the first stable reading."""
+        if self._baseline is None:
+            return None
+        return Baseline(*self._baseline)
@@ -0,0 +1,136 @@
+"""Simulated ADS1015 with a MICS6814 attached, for testing and benchmarking enviroplus.gas"""
+
+import random
+import time
+
+# Default channel voltages, roughly 20k, 400k and 100k Ohms of sensor resistance
+# across the Enviro+ 56k load resistor, and the breakout's 1.25V reference
+DEFAULT_VOLTAGES = {
+    'in0/gnd': 0.87,
+    'in1/gnd': 2.9,
+    'in2/gnd': 2.1,
+    'in3/gnd': 1.25
+}
+
+
+class SimulatedChannel(object):
+    __slots__ = 'voltage', 'noise', 'drift'
+
+    def __init__(self, voltage, noise=0.0, drift=0.0):
+        """Model of the voltage on one ADC input.
+
+        :param voltage: Voltage when the simulation starts
+        :param noise: Standard deviation of white noise added to each conversion, in volts
+        :param drift: Linear drift in volts per second
+
+        """
+        self.voltage = voltage
+        self.noise = noise
+        self.drift = drift
+
+
+class SimulatedADS1015():
+    def __init__(self,
+                 channels=None,
+                 noise=0.002,
+                 drift=0.0,
+                 transfer_time=0.0003,
+                 realtime=True,
+                 seed=None):
+        """Stand-in for ads1015.ADS1015 supporting the calls made by enviroplus.gas.
+
+        Conversions are quantised to the ADS1015's 12 bits at the programmable
+        gain. With realtime, each register access waits `transfer_time` and
+        single-shot conversions wait one conversion period, as the real part
+        would, so reads cost about what they would on a Pi. Without it, only
+        the cost of the Python code is measured.
+
+        :param channels: Dict of SimulatedChannel keyed by multiplexer setting, eg: 'in0/gnd', defaults to DEFAULT_VOLTAGES
+        :param noise: Noise for default channels, in volts
+        :param drift: Drift for default channels, in volts per second
+        :param transfer_time: Seconds per I2C register access
+        :param realtime: Wait for modelled I2C transfers and conversions
+        :param seed: Optional random seed, for repeatable noise
+
+        """
+        if channels is None:
+            channels = dict((name, SimulatedChannel(voltage, noise, drift)) for name, voltage in DEFAULT_VOLTAGES.items())
+        self.channels = channels
+        self.transfer_time = transfer_time
+        self.realtime = realtime
+
+        self._random = random.Random(seed)
+        self._start = time.time()
+        self._mode = 'single'
+        self._gain = 2.048
+        self._sample_rate = 1600
+        self._multiplexer = 'in0/gnd'
+
+    def set_mode(self, value):
+        self._transfer()
+        if value not in ('single', 'continuous'):
+            raise ValueError("Invalid mode {}".format(value))
+        self._mode = value
+
+    def get_mode(self):
+        self._transfer()
+        return self._mode
+
+    def set_programmable_gain(self, value=2.048):
+        self._transfer()
+        if value not in (6.144, 4.096, 2.048, 1.024, 0.512, 0.256):
+            raise KeyError(value)
+        self._gain = value
+
+    def get_programmable_gain(self):
+        self._transfer()
+        return self._gain
+
+    def set_sample_rate(self, value=1600):
+        self._transfer()
+        if value not in (128, 250, 490, 920, 1600, 2400, 3300):
+            raise KeyError(value)
+        self._sample_rate = value
+
+    def get_sample_rate(self):
+        self._transfer()
+        return self._sample_rate
+
+    def set_multiplexer(self, value):
+        self._transfer()
+        # Deprecated alias used by enviroplus.gas for the spare ADC pin
+        if value == 'ref/gnd':
+            value = 'in3/gnd'
+        if value not in self.channels:
+            raise KeyError(value)
+        self._multiplexer = value
+
+    def get_multiplexer(self):
+        self._transfer()
+        return self._multiplexer
+
+    def get_conversion_value(self):
+        self._transfer()
+        return self._convert()
+
+    def get_voltage(self, channel=None):
+        if channel is not None:
+            self.set_multiplexer(channel)
+        # Start the conversion, wait for it, then read the result and gain
+        self._transfer()
+        if self.realtime:
+            time.sleep(1.0 / self._sample_rate)
+        self._transfer()
+        value = self.get_conversion_value()
+        return value * self.get_programmable_gain() / 2048.0
+
+    def _convert(self):
+        channel = self.channels[self._multiplexer]
+        voltage = channel.voltage + channel.drift * (time.time() - self._start)
+        if channel.noise:
+            voltage += self._random.gauss(0.0, channel.noise)
+        return max(-2048, min(2047, int(round(voltage / self._gain * 2048))))
+
+    def _transfer(self):
+        if self.realtime and self.transfer_time:
+            time.sleep(self.transfer_time)
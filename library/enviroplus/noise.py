@@ -1,20 +1,180 @@
-import sounddevice
+import threading
 import numpy
 
+from .audio import SoundDeviceSource
+
+# numpy.fft gained `out` in numpy 2.0, older versions always allocate the FFT result
+try:
+    numpy.fft.rfft(numpy.zeros(2), out=numpy.zeros(2, dtype='complex128'))
+    _RFFT_OUT = True
+except TypeError:
+    _RFFT_OUT = False
+
 
 class Noise():
     def __init__(self,
                  sample_rate=16000,
-                 duration=0.5):
+                 duration=0.5,
+                 stream=False,
+                 fft_size=None,
+                 window=None,
+                 segment_size=None,
+                 hop_size=None,
+                 dtype='float32',
+                 source=None):
         """Noise measurement.
 
+        Frequencies are always given in Hz and mapped to FFT bins internally.
+
         :param sample_rate: Sample rate in Hz
         :param duraton: Duration, in seconds, of noise sample capture
+        :param stream: Capture continuously into a ring buffer instead of recording on every call, see start_stream()
+        :param fft_size: FFT length, defaults to the next power of two above the segment length. Pass sample_rate for the original 1Hz per bin behaviour
+        :param window: Window applied before each FFT, one of 'hann', 'hamming', 'blackman', 'bartlett' or an array of segment length
+        :param segment_size: Enable Welch estimation, averaging overlapping segments of this many samples. Defaults to 'hann' window when set
+        :param hop_size: Samples between the start of each Welch segment, defaults to half of segment_size
+        :param dtype: Capture sample format, one of 'float32' (default), 'float64' or 'int16'. int16 magnitudes are in raw sample counts
+        :param source: Optional enviroplus.audio source to capture from, eg: a WAV file, defaults to the microphone
 
         """
 
+        if source is None:
+            source = SoundDeviceSource()
+        if source.sample_rate is not None and source.sample_rate != sample_rate:
+            raise ValueError("sample_rate must match the source's {}Hz".format(source.sample_rate))
+
         self.duration = duration
         self.sample_rate = sample_rate
+        self.dtype = dtype
+        self.source = source
+
+        capture_size = int(self.duration * self.sample_rate)
+
+        if segment_size is None:
+            segment_size = capture_size
+        elif window is None:
+            window = 'hann'
+        if not 0 < segment_size <= capture_size:
+            raise ValueError("segment_size must be between 1 and {} samples".format(capture_size))
+        if hop_size is None:
+            hop_size = max(1, segment_size // 2)
+        if hop_size < 1:
+            raise ValueError("hop_size must be a positive number of samples")
+        self.segment_size = int(segment_size)
+        self.hop_size = int(hop_size)
+
+        if fft_size is None:
+            fft_size = _next_power_of_two(self.segment_size)
+        if fft_size < 1:
+            raise ValueError("fft_size must be a positive number of samples")
+        self.fft_size = int(fft_size)
+
+        # Scratch buffers depend only on the configuration, so are allocated once
+        # and reused by every capture to keep the analysis loop allocation free
+        self._magnitude_dtype = 'float64' if dtype == 'float64' else 'float32'
+        fft_dtype = 'complex128' if dtype == 'float64' else 'complex64'
+        bins = self.fft_size // 2 + 1
+
+        self._recording = numpy.zeros((capture_size, 1), dtype=dtype)
+        self._window = None
+        self._window_gain = 1.0
+        if window is None:
+            self._fft = numpy.empty(bins, dtype=fft_dtype)
+        else:
+            self._window = _get_window(window, self.segment_size)
+            self._window_gain = self.segment_size / float(numpy.sum(self._window))
+            self._segment_count = 1 + (capture_size - self.segment_size) // self.hop_size
+            self._segments = numpy.empty((self._segment_count, self.segment_size), dtype=self._magnitude_dtype)
+            self._fft = numpy.empty((self._segment_count, bins), dtype=fft_dtype)
+            self._power = numpy.empty((self._segment_count, bins), dtype=self._magnitude_dtype)
+
+        self._spectrum = self._new_spectrum()
+
+        self._streaming = False
+        self._stream_lock = threading.Lock()
+        self._stream_ready = threading.Event()
+        self._buffer = None
+        self._buffer_size = int(self.duration * self.sample_rate)
+        self._buffer_index = 0
+        self._buffer_frames = 0
+        self._stream_position = 0
+
+        if stream:
+            self.start_stream()
+
+    def start_stream(self):
+        """Start continuous capture into a ring buffer.
+
+        Audio is written into a preallocated buffer of `duration` seconds from
+        the source's stream callback, so the analysis methods return immediately
+        using the most recent window rather than blocking on a new recording.
+
+        """
+        if self._streaming:
+            return
+
+        self._buffer = numpy.zeros((self._buffer_size, 1), dtype=self.dtype)
+        self._buffer_index = 0
+        self._buffer_frames = 0
+        self._stream_position = 0
+        self._stream_ready.clear()
+
+        self.source.start(self._stream_callback, self.sample_rate, self.dtype)
+        self._streaming = True
+
+    def stop_stream(self):
+        """Stop continuous capture and return to recording on every call."""
+        if not self._streaming:
+            return
+
+        self.source.stop()
+        self._streaming = False
+
+    def read_samples(self, position=None):
+        """Return new mono samples, and the position to pass to the next call.
+
+        In stream mode this returns all audio captured since `position`, so
+        consecutive calls see contiguous audio. At most one ring buffer of audio
+        is returned, anything older has been overwritten and is lost.
+
+        Without a position, or when not streaming, this returns the same window
+        the analysis methods would use.
+
+        :param position: Position returned by a previous call
+
+        """
+        if not self._streaming:
+            return self._record()[:, 0].copy(), None
+
+        self._stream_ready.wait()
+        with self._stream_lock:
+            available = self._buffer_size
+            if position is not None:
+                available = min(self._stream_position - position, available)
+            end = self._buffer_index
+            start = end - available
+            if start >= 0:
+                samples = self._buffer[start:end, 0].copy()
+            else:
+                samples = numpy.concatenate((self._buffer[start:, 0], self._buffer[:end, 0]))
+            return samples, self._stream_position
+
+    def capture_spectrum(self, out=None):
+        """Capture audio and return its Spectrum.
+
+        The returned Spectrum can answer any number of band, profile and peak
+        queries for the same instant without recording or transforming again.
+
+        :param out: Optional Spectrum from an earlier call on this instance to overwrite, instead of allocating a new one
+
+        """
+        if out is None:
+            out = self._new_spectrum()
+
+        recording = self._record()
+        self._magnitude(recording[:, 0], out.magnitude)
+        out._update()
+        return out
 
     def get_amplitudes_at_frequency_ranges(self, ranges):
         """Return the mean amplitude of frequencies in the given ranges.
@@ -22,13 +182,7 @@ class Noise():
         :param ranges: List of ranges including a start and end range
 
         """
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-        result = []
-        for r in ranges:
-            start, end = r
-            result.append(numpy.mean(magnitude[start:end]))
-        return result
+        return self.capture_spectrum(self._spectrum).get_amplitudes_at_frequency_ranges(ranges)
 
     def get_amplitude_at_frequency_range(self, start, end):
         """Return the mean amplitude of frequencies in the specified range.
@@ -41,9 +195,7 @@ class Noise():
         if start > n or end > n:
             raise ValueError("Maxmimum frequency is {}".format(n))
 
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-        return numpy.mean(magnitude[start:end])
+        return self.capture_spectrum(self._spectrum).get_amplitude_at_frequency_range(start, end)
 
     def get_noise_profile(self,
                           noise_floor=100,
@@ -59,32 +211,203 @@ class Noise():
         :param mid: Percentage of frequency ranges to count in the mid bin (as a float, 0.5 = 50%)
         :param high: Optional percentage for high bin, effectively creates a "Low-pass" if total percentage is less than 100%
 
+        """
+        return self.capture_spectrum(self._spectrum).get_noise_profile(noise_floor, low, mid, high)
+
+    def _new_spectrum(self):
+        magnitude = numpy.zeros(self.fft_size // 2 + 1, dtype=self._magnitude_dtype)
+        return Spectrum(magnitude, self.sample_rate, self.fft_size)
+
+    def _rfft(self, samples):
+        if _RFFT_OUT:
+            return numpy.fft.rfft(samples, n=self.fft_size, axis=-1, out=self._fft)
+        return numpy.fft.rfft(samples, n=self.fft_size, axis=-1)
+
+    def _magnitude(self, samples, out):
+        if self._window is None:
+            return numpy.abs(self._rfft(samples), out=out)
+
+        # Welch: average the power of windowed, overlapping segments, then
+        # correct for the window so a tone keeps the amplitude of an unwindowed FFT.
+        # The segments are a strided view of the capture, so framing copies nothing.
+        stride = samples.strides[0]
+        segments = numpy.lib.stride_tricks.as_strided(
+            samples,
+            shape=(self._segment_count, self.segment_size),
+            strides=(self.hop_size * stride, stride))
+        numpy.multiply(segments, self._window, out=self._segments)
+
+        power = numpy.abs(self._rfft(self._segments), out=self._power)
+        numpy.square(power, out=power)
+        numpy.mean(power, axis=0, out=out)
+        numpy.sqrt(out, out=out)
+        out *= self._window_gain
+        return out
+
+    def _record(self):
+        if self._streaming:
+            return self._read_stream()
+
+        self.source.record(self._recording, self.sample_rate)
+        return self._recording
+
+    def _read_stream(self):
+        # Only the very first read waits, until one full window has been captured
+        self._stream_ready.wait()
+        with self._stream_lock:
+            index = self._buffer_index
+            tail = self._buffer_size - index
+            self._recording[:tail] = self._buffer[index:]
+            self._recording[tail:] = self._buffer[:index]
+        return self._recording
+
+    def _stream_callback(self, indata, frames, time, status):
+        size = self._buffer_size
+        with self._stream_lock:
+            if frames >= size:
+                self._buffer[:] = indata[frames - size:]
+                self._buffer_index = 0
+            else:
+                end = self._buffer_index + frames
+                if end <= size:
+                    self._buffer[self._buffer_index:end] = indata
+                else:
+                    split = size - self._buffer_index
+                    self._buffer[self._buffer_index:] = indata[:split]
+                    self._buffer[:end - size] = indata[split:]
+                self._buffer_index = end % size
+            self._buffer_frames = min(size, self._buffer_frames + frames)
+            self._stream_position += frames
+
+        if self._buffer_frames == size:
+            self._stream_ready.set()
+
+
+class Spectrum():
+    def __init__(self, magnitude, sample_rate, fft_size=None):
+        """Magnitude spectrum of a single noise capture.
+
+        :param magnitude: Magnitude of each frequency bin, as returned by numpy.abs(numpy.fft.rfft(...))
+        :param sample_rate: Sample rate in Hz of the capture
+        :param fft_size: FFT length used to produce magnitude, defaults to sample_rate (1Hz per bin)
+
+        """
+
+        self.magnitude = magnitude
+        self.sample_rate = sample_rate
+        self.fft_size = sample_rate if fft_size is None else fft_size
+        self.bin_width = float(self.sample_rate) / self.fft_size
+
+        # Prefix sum of the magnitude, so the sum of any band is the difference of two entries
+        self._cumulative = numpy.zeros(len(magnitude) + 1, dtype='float64')
+        self._update()
+
+    def get_amplitudes_at_frequency_ranges(self, ranges):
+        """Return the mean amplitude of frequencies in the given ranges.
+
+        All ranges are answered in one vectorised operation, so large banks
+        such as 1/3 or 1/24 octave bands cost little more than a single band.
+
+        :param ranges: List of ranges including a start and end range
+
+        """
+        ranges = numpy.asarray(ranges, dtype='float64').reshape(-1, 2)
+        return list(self._band_means(ranges[:, 0], ranges[:, 1]))
+
+    def get_amplitude_at_frequency_range(self, start, end):
+        """Return the mean amplitude of frequencies in the specified range.
+
+        :param start: Start frequency (in Hz)
+        :param end: End frequency (in Hz)
+
+        """
+        n = self.sample_rate // 2
+        if start > n or end > n:
+            raise ValueError("Maxmimum frequency is {}".format(n))
+
+        return self._band_means(numpy.asarray([start]), numpy.asarray([end]))[0]
+
+    def get_noise_profile(self,
+                          noise_floor=100,
+                          low=0.12,
+                          mid=0.36,
+                          high=None):
+        """Returns a noise charateristic profile.
+
+        See Noise.get_noise_profile()
+
         """
 
         if high is None:
             high = 1.0 - low - mid
 
-        recording = self._record()
-        magnitude = numpy.abs(numpy.fft.rfft(recording[:, 0], n=self.sample_rate))
-
         sample_count = (self.sample_rate // 2) - noise_floor
 
         mid_start = noise_floor + int(sample_count * low)
         high_start = mid_start + int(sample_count * mid)
         noise_ceiling = high_start + int(sample_count * high)
 
-        amp_low = numpy.mean(magnitude[noise_floor:mid_start])
-        amp_mid = numpy.mean(magnitude[mid_start:high_start])
-        amp_high = numpy.mean(magnitude[high_start:noise_ceiling])
-        amp_total = (amp_low + amp_mid + amp_high) / 3.0
+        amps = self._band_means(
+            numpy.asarray([noise_floor, mid_start, high_start]),
+            numpy.asarray([mid_start, high_start, noise_ceiling]))
+        amp_total = numpy.mean(amps)
 
-        return amp_low, amp_mid, amp_high, amp_total
+        return amps[0], amps[1], amps[2], amp_total
 
-    def _record(self):
-        return sounddevice.rec(
-            int(self.duration * self.sample_rate),
-            samplerate=self.sample_rate,
-            blocking=True,
-            channels=1,
-            dtype='float64'
-        )
+    def get_peak(self, start=0, end=None):
+        """Return the frequency and amplitude of the loudest bin in a range.
+
+        :param start: Start frequency (in Hz)
+        :param end: Optional end frequency (in Hz), defaults to the maximum frequency
+
+        """
+        if end is None:
+            end = self.sample_rate // 2
+
+        first = int(self._bins(start))
+        index = first + int(numpy.argmax(self.magnitude[first:int(self._bins(end))]))
+        return index * self.bin_width, self.magnitude[index]
+
+    def _update(self):
+        # Refresh the prefix sum in place after magnitude has been overwritten
+        numpy.cumsum(self.magnitude, dtype='float64', out=self._cumulative[1:])
+
+    def _bins(self, frequencies):
+        return numpy.rint(numpy.asarray(frequencies, dtype='float64') / self.bin_width).astype(int)
+
+    def _band_means(self, starts, ends):
+        # Map Hz to bins, then resolve them exactly as magnitude[start:end] would
+        starts = self._bins(starts)
+        ends = self._bins(ends)
+        size = len(self._cumulative) - 1
+        starts = numpy.clip(numpy.where(numpy.less(starts, 0), starts + size, starts), 0, size)
+        ends = numpy.clip(numpy.where(numpy.less(ends, 0), ends + size, ends), 0, size)
+        ends = numpy.maximum(ends, starts)
+
+        # Empty bands are NaN, matching numpy.mean() of an empty slice
+        with numpy.errstate(invalid='ignore'):
+            return (self._cumulative[ends] - self._cumulative[starts]) / (ends - starts)
+
+
+_WINDOWS = {
+    'hann': numpy.hanning,
+    'hamming': numpy.hamming,
+    'blackman': numpy.blackman,
+    'bartlett': numpy.bartlett
+}
+
+
+def _get_window(window, size):
+    if isinstance(window, str):
+        if window not in _WINDOWS:
+            raise ValueError("window must be one of {}".format(', '.join(sorted(_WINDOWS))))
+        return _WINDOWS[window](size)
+
+    window = numpy.asarray(window, dtype='float64')
+    if window.shape != (size,):
+        raise ValueError("window must be an array of {} samples".format(size))
+    return window
+
+
+def _next_power_of_two(value):
+    return 1 << max(0, int(value) - 1).bit_length()
@@ -0,0 +1,181 @@
+"""Bounded memory noise level statistics"""
+
+import time
+import numpy
+
+# Smallest amplitude converted to decibels, keeps log10() finite for silence
+_SILENCE = 1e-10
+
+
+class LevelHistogram():
+    def __init__(self,
+                 minimum=-160.0,
+                 maximum=160.0,
+                 resolution=0.1,
+                 channels=1):
+        """Fixed resolution histogram of levels, for percentiles in bounded memory.
+
+        Memory depends only on the range and resolution, never on how many
+        levels are added. Levels outside the range are counted in the first
+        or last bin.
+
+        :param minimum: Lowest level, in dB
+        :param maximum: Highest level, in dB
+        :param resolution: Width of each bin, in dB
+        :param channels: Number of levels, eg: frequency bands, in each add() row
+
+        """
+        self.minimum = minimum
+        self.resolution = resolution
+        self.channels = channels
+        self.bins = int(round((maximum - minimum) / resolution))
+
+        if self.bins < 1:
+            raise ValueError("maximum must be at least one resolution step above minimum")
+
+        self._counts = numpy.zeros((channels, self.bins), dtype='int64')
+        self._channel_index = numpy.arange(channels)
+        self.reset()
+
+    def reset(self):
+        """Discard all levels."""
+        self._counts[:] = 0
+        self.count = 0
+        self.maximum = numpy.full(self.channels, -numpy.inf)
+
+    def add(self, levels):
+        """Add levels.
+
+        :param levels: One level per channel, or an array of rows of one level per channel
+
+        """
+        levels = numpy.asarray(levels, dtype='float64').reshape(-1, self.channels)
+        index = ((levels - self.minimum) / self.resolution).astype(int)
+        numpy.clip(index, 0, self.bins - 1, out=index)
+        numpy.add.at(self._counts, (self._channel_index, index), 1)
+        numpy.maximum(self.maximum, levels.max(axis=0), out=self.maximum)
+        self.count += len(levels)
+
+    def percentile(self, fraction):
+        """Return the level below which `fraction` of levels fall, per channel.
+
+        Accurate to the histogram resolution. NaN if no levels have been added.
+
+        :param fraction: Fraction from 0.0 to 1.0, eg: 0.9 for the 90th percentile
+
+        """
+        if self.count == 0:
+            return numpy.full(self.channels, numpy.nan)
+
+        cumulative = numpy.cumsum(self._counts, axis=1)
+        index = numpy.sum(cumulative < fraction * self.count, axis=1)
+        return self.minimum + (index + 0.5) * self.resolution
+
+
+class IntervalStatistics(object):
+    __slots__ = 'start', 'end', 'count', 'levels', 'maximum'
+
+    def __init__(self, start, end, count, levels, maximum):
+        self.start = start
+        self.end = end
+        self.count = count
+        self.levels = levels
+        self.maximum = maximum
+
+    def __repr__(self):
+        fmt = "{start} - {end}: {count} readings"
+        for name in sorted(self.levels, key=lambda name: int(name[1:])):
+            fmt += "\n{}: {}".format(name, ", ".join("{:05.02f}".format(level) for level in self.levels[name]))
+        return fmt.format(
+            start=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.start)),
+            end=time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.end)),
+            count=self.count)
+
+    __str__ = __repr__
+
+
+class NoiseStatistics():
+    def __init__(self,
+                 interval=3600.0,
+                 exceedances=(10, 50, 90),
+                 scale='amplitude',
+                 resolution=0.1):
+        """Incremental percentile statistics of noise levels per interval.
+
+        Consumes levels, eg: the result of Noise.get_noise_profile() or
+        SPLMeter.get_level(), into a LevelHistogram and emits IntervalStatistics
+        each time an interval ends. Memory stays bounded however long it runs.
+
+        Intervals are aligned to the clock, so an interval of 3600 runs on the hour.
+
+        :param interval: Interval length in seconds
+        :param exceedances: Exceedance levels to report, eg: 10 for L10, the level exceeded 10% of the time
+        :param scale: 'amplitude' for linear levels such as Noise amplitudes, binned in dB and reported as amplitudes, or 'decibel' for levels already in dB
+        :param resolution: Histogram resolution, in dB
+
+        """
+        if scale not in ('amplitude', 'decibel'):
+            raise ValueError("scale must be one of 'amplitude' or 'decibel'")
+
+        self.interval = interval
+        self.exceedances = tuple(exceedances)
+        self.scale = scale
+        self.resolution = resolution
+
+        self._histogram = None
+        self._start = None
+
+    def add(self, levels, timestamp=None):
+        """Add one reading.
+
+        Returns IntervalStatistics for the previous interval if this reading
+        starts a new one, otherwise None.
+
+        :param levels: A level, or one level per band
+        :param timestamp: Time of the reading in seconds since the epoch, defaults to now
+
+        """
+        if timestamp is None:
+            timestamp = time.time()
+
+        levels = numpy.atleast_1d(numpy.asarray(levels, dtype='float64'))
+        if self.scale == 'amplitude':
+            levels = 20.0 * numpy.log10(numpy.maximum(levels, _SILENCE))
+
+        if self._histogram is None:
+            self._histogram = LevelHistogram(resolution=self.resolution, channels=len(levels))
+        elif len(levels) != self._histogram.channels:
+            raise ValueError("Expected {} levels per reading".format(self._histogram.channels))
+
+        result = None
+        start = timestamp - (timestamp % self.interval)
+        if self._start is None:
+            self._start = start
+        elif start != self._start:
+            result = self.get_statistics()
+            self._histogram.reset()
+            self._start = start
+
+        self._histogram.add(levels)
+        return result
+
+    def get_statistics(self):
+        """Return IntervalStatistics for the current, incomplete, interval, or None."""
+        if self._histogram is None or self._histogram.count == 0:
+            return None
+
+        levels = {}
+        for exceedance in self.exceedances:
+            levels['L{}'.format(exceedance)] = self._to_scale(self._histogram.percentile(1.0 - exceedance / 100.0))
+
+        return IntervalStatistics(
+            start=self._start,
+            end=self._start + self.interval,
+            count=self._histogram.count,
+            levels=levels,
+            maximum=self._to_scale(self._histogram.maximum))
+
+    def _to_scale(self, levels):
+        if self.scale == 'amplitude':
+            levels = 10.0 ** (levels / 20.0)
+        return list(levels)
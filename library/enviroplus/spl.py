@@ -0,0 +1,242 @@
+"""Calibrated sound pressure level metering built on enviroplus.noise"""
+
+import numpy
+
+from .noise import _next_power_of_two
+from .noisestats import LevelHistogram
+
+# Block levels are binned in dBFS, the calibration offset is applied when reporting
+_HISTOGRAM_MINIMUM = -150.0
+_HISTOGRAM_MAXIMUM = 10.0
+_HISTOGRAM_RESOLUTION = 0.1
+
+# Mean square of a digital silence block, keeps log10() finite
+_SILENCE = 1e-20
+
+
+def a_weighting(frequencies):
+    """Return the IEC 61672 A-weighting gain, in dB, at each frequency.
+
+    :param frequencies: Frequencies in Hz
+
+    """
+    f2 = numpy.asarray(frequencies, dtype='float64') ** 2
+    gain = (12194.0 ** 2) * f2 ** 2
+    gain /= (f2 + 20.6 ** 2) * numpy.sqrt((f2 + 107.7 ** 2) * (f2 + 737.9 ** 2)) * (f2 + 12194.0 ** 2)
+    with numpy.errstate(divide='ignore'):
+        return 20.0 * numpy.log10(gain) + 2.0
+
+
+def c_weighting(frequencies):
+    """Return the IEC 61672 C-weighting gain, in dB, at each frequency.
+
+    :param frequencies: Frequencies in Hz
+
+    """
+    f2 = numpy.asarray(frequencies, dtype='float64') ** 2
+    gain = (12194.0 ** 2) * f2
+    gain /= (f2 + 20.6 ** 2) * (f2 + 12194.0 ** 2)
+    with numpy.errstate(divide='ignore'):
+        return 20.0 * numpy.log10(gain) + 0.06
+
+
+def z_weighting(frequencies):
+    """Return the flat Z-weighting gain, in dB, at each frequency.
+
+    :param frequencies: Frequencies in Hz
+
+    """
+    return numpy.zeros_like(numpy.asarray(frequencies, dtype='float64'))
+
+
+WEIGHTINGS = {
+    'A': a_weighting,
+    'C': c_weighting,
+    'Z': z_weighting
+}
+
+
+class SoundLevels(object):
+    __slots__ = 'leq', 'lmax', 'l10', 'l90', 'duration'
+
+    def __init__(self, leq, lmax, l10, l90, duration):
+        self.leq = leq
+        self.lmax = lmax
+        self.l10 = l10
+        self.l90 = l90
+        self.duration = duration
+
+    def __repr__(self):
+        return """Leq: {leq:05.02f} dB
+Lmax: {lmax:05.02f} dB
+L10: {l10:05.02f} dB
+L90: {l90:05.02f} dB
+Duration: {duration:05.02f} seconds""".format(
+            leq=self.leq,
+            lmax=self.lmax,
+            l10=self.l10,
+            l90=self.l90,
+            duration=self.duration)
+
+    __str__ = __repr__
+
+
+class SPLMeter():
+    def __init__(self,
+                 noise,
+                 weighting='A',
+                 period=60.0,
+                 block_duration=0.125,
+                 calibration_offset=0.0):
+        """Sound pressure level meter.
+
+        Audio from `noise` is cut into short blocks, each of which is reduced to a
+        frequency weighted level. Block levels are integrated into Leq, Lmax,
+        L10 and L90 over each period. In stream mode every captured sample is
+        measured exactly once, so the meter can run continuously.
+
+        Levels are in dB relative to digital full scale plus the calibration
+        offset, see calibrate().
+
+        :param noise: enviroplus.noise.Noise instance to read audio from
+        :param weighting: Frequency weighting, one of 'A', 'C' or 'Z'
+        :param period: Integration period in seconds
+        :param block_duration: Duration, in seconds, of each measured block. 0.125 matches "fast" time weighting
+        :param calibration_offset: dB added to every level, the SPL of a full scale signal
+
+        """
+        if weighting not in WEIGHTINGS:
+            raise ValueError("weighting must be one of {}".format(', '.join(sorted(WEIGHTINGS))))
+
+        self.noise = noise
+        self.weighting = weighting
+        self.block_size = int(block_duration * noise.sample_rate)
+        self.block_duration = float(self.block_size) / noise.sample_rate
+        self.period_blocks = max(1, int(round(period / self.block_duration)))
+
+        if self.block_size < 1:
+            raise ValueError("block_duration is shorter than one sample")
+
+        self._calibration_offset = float(calibration_offset)
+
+        # Per-bin weighting, also folding in the Parseval scaling that turns
+        # the power of a one sided FFT back into the block's mean square
+        self._fft_size = _next_power_of_two(self.block_size)
+        bins = self._fft_size // 2 + 1
+        frequencies = numpy.arange(bins) * float(noise.sample_rate) / self._fft_size
+        parseval = numpy.full(bins, 2.0)
+        parseval[0] = 1.0
+        parseval[-1] = 1.0
+        gain = 10.0 ** (WEIGHTINGS[weighting](frequencies) / 10.0)
+        self._weights = gain * parseval / (self._fft_size * self.block_size)
+
+        self._histogram = LevelHistogram(_HISTOGRAM_MINIMUM, _HISTOGRAM_MAXIMUM, _HISTOGRAM_RESOLUTION)
+
+        self._pending = numpy.zeros(0)
+        self._position = None
+        self._level = None
+        self._reset()
+
+    def set_calibration_offset(self, value):
+        """Set the calibration offset.
+
+        :param value: dB added to every level, the SPL of a full scale signal
+
+        """
+        self._calibration_offset = float(value)
+
+    def get_calibration_offset(self):
+        """Return the calibration offset in dB."""
+        return self._calibration_offset
+
+    def calibrate(self, reference_level=94.0):
+        """Calibrate against a reference sound source.
+
+        Measures one capture from the Noise instance, which should be hearing a
+        calibrator, and sets the offset so that it reads `reference_level`.
+
+        :param reference_level: Level of the reference source in dB, 94.0 for a standard 1kHz calibrator
+
+        """
+        samples, _ = self.noise.read_samples()
+        count = len(samples) // self.block_size
+        if count == 0:
+            raise ValueError("Noise duration is shorter than block_duration")
+
+        mean_square = self._mean_squares(samples[:count * self.block_size].reshape(count, self.block_size))
+        level = 10.0 * numpy.log10(max(numpy.mean(mean_square), _SILENCE))
+        self._calibration_offset = reference_level - level
+        return self._calibration_offset
+
+    def update(self):
+        """Measure newly captured audio from the Noise instance.
+
+        Returns a list of SoundLevels for every period completed by this audio.
+
+        """
+        samples, self._position = self.noise.read_samples(self._position)
+        return self.process(samples)
+
+    def process(self, samples):
+        """Measure a block of samples.
+
+        Samples left over after the last whole block are kept for the next call.
+
+        Returns a list of SoundLevels for every period completed by these samples.
+
+        :param samples: Mono audio samples
+
+        """
+        samples = numpy.concatenate((self._pending, samples))
+        count = len(samples) // self.block_size
+        self._pending = samples[count * self.block_size:]
+        if count == 0:
+            return []
+
+        mean_square = self._mean_squares(samples[:count * self.block_size].reshape(count, self.block_size))
+        levels = 10.0 * numpy.log10(numpy.maximum(mean_square, _SILENCE))
+        self._level = levels[-1]
+
+        completed = []
+        start = 0
+        while start < count:
+            end = min(count, start + self.period_blocks - self._blocks)
+            self._accumulate(mean_square[start:end], levels[start:end])
+            start = end
+            if self._blocks == self.period_blocks:
+                completed.append(self.get_levels())
+                self._reset()
+        return completed
+
+    def get_level(self):
+        """Return the level of the most recent block in dB, or None."""
+        if self._level is None:
+            return None
+        return self._level + self._calibration_offset
+
+    def get_levels(self):
+        """Return SoundLevels for the current, incomplete, period, or None."""
+        if self._blocks == 0:
+            return None
+
+        offset = self._calibration_offset
+        return SoundLevels(
+            leq=10.0 * numpy.log10(max(self._energy / self._blocks, _SILENCE)) + offset,
+            lmax=self._histogram.maximum[0] + offset,
+            l10=self._histogram.percentile(0.9)[0] + offset,
+            l90=self._histogram.percentile(0.1)[0] + offset,
+            duration=self._blocks * self.block_duration)
+
+    def _mean_squares(self, blocks):
+        power = numpy.abs(numpy.fft.rfft(blocks, n=self._fft_size, axis=-1)) ** 2
+        return power.dot(self._weights)
+
+    def _accumulate(self, mean_square, levels):
+        self._energy += numpy.sum(mean_square)
+        self._blocks += len(levels)
+        self._histogram.add(levels)
+
+    def _reset(self):
+        self._energy = 0.0
+        self._blocks = 0
+        self._histogram.reset()
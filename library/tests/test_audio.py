@@ -0,0 +1,125 @@
+import struct
+import sys
+import time
+import wave
+import pytest
+
+
+def write_wav(path, samples, sample_rate=16000):
+    with wave.open(str(path), 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.astype('<i2').tobytes())
+
+
+def write_float_wav(path, samples, sample_rate=16000):
+    data = samples.astype('<f4').tobytes()
+    with open(str(path), 'wb') as f:
+        f.write(struct.pack('<4sI4s', b'RIFF', 4 + 24 + 8 + len(data), b'WAVE'))
+        f.write(struct.pack('<4sIHHIIHH', b'fmt ', 16, 3, 1, sample_rate, sample_rate * 4, 4, 32))
+        f.write(struct.pack('<4sI', b'data', len(data)))
+        f.write(data)
+
+
+def test_synthetic_source_tone():
+    pytest.importorskip('numpy')
+    from enviroplus.audio import SyntheticSource
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.5, source=SyntheticSource(tones=((1500.0, 0.5),), noise=0.01, seed=0))
+    frequency, _ = noise.capture_spectrum().get_peak()
+    assert abs(frequency - 1500.0) < 2.0
+
+    with pytest.raises(ValueError):
+        Noise(sample_rate=8000, source=SyntheticSource(sample_rate=16000))
+
+
+def test_synthetic_source_is_continuous():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.audio import SyntheticSource
+
+    source = SyntheticSource(tones=((440.0, 1.0),))
+    whole = source.record(numpy.zeros((1000, 1)), 16000).copy()
+
+    source = SyntheticSource(tones=((440.0, 1.0),))
+    parts = numpy.concatenate([source.record(numpy.zeros((n, 1)), 16000).copy() for n in (300, 700)])
+    numpy.testing.assert_allclose(parts, whole)
+
+
+def test_wav_file_source(tmpdir):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.audio import WavFileSource
+
+    samples = (numpy.arange(1000) - 500) * 64
+    path = tmpdir.join('replay.wav')
+    write_wav(path, samples)
+
+    source = WavFileSource(str(path))
+    assert source.sample_rate == 16000
+    assert source.frames == 1000
+
+    out = numpy.zeros((600, 1), dtype='float32')
+    source.record(out, 16000)
+    numpy.testing.assert_allclose(out[:, 0], samples[:600] / 32768.0)
+
+    out = numpy.zeros((600, 1), dtype='int16')
+    with pytest.raises(EOFError):
+        source.record(out, 16000)
+
+    source = WavFileSource(str(path), loop=True)
+    out = numpy.zeros((1500, 1), dtype='int16')
+    source.record(out, 16000)
+    numpy.testing.assert_array_equal(out[:, 0], numpy.concatenate((samples, samples[:500])))
+
+
+def test_wav_file_source_float(tmpdir):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.audio import WavFileSource
+
+    samples = numpy.linspace(-1.0, 1.0, 256)
+    path = tmpdir.join('float.wav')
+    write_float_wav(path, samples, sample_rate=8000)
+
+    source = WavFileSource(str(path))
+    assert source.sample_rate == 8000
+    out = source.record(numpy.zeros((256, 1)), 8000)
+    numpy.testing.assert_allclose(out[:, 0], samples, rtol=1e-6)
+
+    path = tmpdir.join('text.wav')
+    path.write('not a wav file')
+    with pytest.raises(ValueError):
+        WavFileSource(str(path))
+
+
+def test_replay_stream():
+    pytest.importorskip('numpy')
+    from enviroplus.audio import SyntheticSource
+    from enviroplus.noise import Noise
+
+    source = SyntheticSource(tones=((1000.0, 0.5),), realtime=False)
+    noise = Noise(sample_rate=16000, duration=0.5, stream=True, source=source)
+
+    samples, position = noise.read_samples()
+    assert len(samples) == 8000
+
+    deadline = time.time() + 5.0
+    while noise._stream_position == position and time.time() < deadline:
+        time.sleep(0.01)
+
+    samples, _ = noise.read_samples(position)
+    assert len(samples) > 0
+
+    noise.stop_stream()
+    assert not source._thread.is_alive()
+
+
+def test_sounddevice_missing():
+    pytest.importorskip('numpy')
+    sys.modules['sounddevice'] = None
+    try:
+        from enviroplus.noise import Noise
+        with pytest.raises(ImportError):
+            Noise()
+    finally:
+        del sys.modules['sounddevice']
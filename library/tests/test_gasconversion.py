@@ -0,0 +1,77 @@
+import pytest
+
+
+def test_to_resistance_matches_gas():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.gasconversion import to_resistance, to_voltage
+
+    voltages = numpy.array([0.0, 0.5, 1.65, 3.0, 3.3])
+    resistance = to_resistance(voltages)
+    numpy.testing.assert_allclose(resistance, [0.0, 0.5 * 56000 / 2.8, 56000.0, 560000.0, 0.0])
+    numpy.testing.assert_allclose(to_voltage(resistance[:4]), voltages[:4])
+
+    assert to_resistance(1.0, supply_voltage=5.0, load_resistance=10000) == pytest.approx(2500.0)
+
+
+def test_to_ppm():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.gasconversion import to_ppm
+
+    numpy.testing.assert_allclose(to_ppm('co', [1.0, 0.1]), [4.385, 4.385 * 0.1 ** -1.179])
+    with pytest.raises(ValueError):
+        to_ppm('radon', 1.0)
+
+
+def test_baseline_ppm(tmpdir):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.gasconversion import Baseline, to_ppm
+
+    class Readings(object):
+        oxidising = [20000.0, 21000.0, 22000.0]
+        reducing = [400000.0, 200000.0, 400000.0]
+        nh3 = [100000.0, 100000.0, 50000.0]
+
+    baseline = Baseline.from_readings(Readings)
+    assert (baseline.oxidising, baseline.reducing, baseline.nh3) == (21000.0, 400000.0, 100000.0)
+
+    ppm = baseline.ppm(Readings, gases=['co', 'nh3'])
+    assert sorted(ppm) == ['co', 'nh3']
+    numpy.testing.assert_allclose(ppm['co'], to_ppm('co', [1.0, 0.5, 1.0]))
+    numpy.testing.assert_allclose(ppm['nh3'], to_ppm('nh3', [1.0, 1.0, 0.5]))
+
+    filename = str(tmpdir.join('baselines.json'))
+    baseline.save(filename, device='kitchen')
+    Baseline(1, 2, 3).save(filename, device='garage')
+    loaded = Baseline.load(filename, device='kitchen')
+    assert loaded.reducing == 400000.0
+    assert Baseline.load(filename, device='garage').nh3 == 3.0
+    with pytest.raises(KeyError):
+        Baseline.load(filename, device='attic')
+
+
+def test_baseline_from_batch(GPIO):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.gas import Mics6814Batch
+    from enviroplus.gasconversion import Baseline
+
+    batch = Mics6814Batch(timestamp=[0.0, 1.0], ox=[10.0, 30.0], red=[5.0, 5.0], nh3=[8.0, 8.0])
+    baseline = Baseline.from_readings(batch)
+    assert baseline.oxidising == 20.0
+    numpy.testing.assert_allclose(baseline.ppm(batch[1:])['no2'], [(1.5 ** 1.007) / 6.855])
+
+
+def test_baseline_tracker(GPIO):
+    from enviroplus.gas import Mics6814Reading
+    from enviroplus.gasconversion import BaselineTracker
+
+    tracker = BaselineTracker(time_constant=100.0, warmup_time=600.0)
+    assert tracker.get_baseline() is None
+    assert not tracker.update(Mics6814Reading(1.0, 1.0, 1.0, timestamp=0.0, heater_time=10.0))
+    assert not tracker.update(Mics6814Reading(1.0, 1.0, 1.0, timestamp=0.0))
+
+    assert tracker.update(Mics6814Reading(1000.0, 2000.0, 3000.0, timestamp=1000.0, heater_time=600.0))
+    assert tracker.get_baseline().reducing == 2000.0
+
+    tracker.update(Mics6814Reading(2000.0, 2000.0, 3000.0, timestamp=1100.0, heater_time=700.0))
+    assert tracker.get_baseline().oxidising == pytest.approx(2000.0 - 1000.0 / 2.718281828459045)
+    assert tracker.get_baseline().nh3 == 3000.0
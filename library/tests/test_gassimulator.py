@@ -0,0 +1,59 @@
+import sys
+import pytest
+
+
+def test_gas_without_gpio():
+    sys.modules.pop('RPi', None)
+    sys.modules.pop('RPi.GPIO', None)
+    from enviroplus import gas
+    from enviroplus.gassimulator import SimulatedADS1015
+
+    if gas.GPIO is not None:
+        pytest.skip("RPi.GPIO is installed")
+
+    with pytest.raises(ImportError):
+        gas.Mics6814(adc=SimulatedADS1015(realtime=False))
+
+    gas.setup(backend=SimulatedADS1015(realtime=False, noise=0.0), heater_pin=None)
+    reading = gas.read_all()
+    assert reading.oxidising == pytest.approx(0.87 * 56000 / (3.3 - 0.87))
+    assert reading.adc is None
+    gas.cleanup()
+    assert gas.get_state() == gas.STATE_OFF
+
+
+def test_simulated_noise_and_drift(GPIO):
+    import time
+    from enviroplus import gas
+    from enviroplus.gassimulator import SimulatedADS1015, SimulatedChannel
+
+    channels = {
+        'in0/gnd': SimulatedChannel(1.0, noise=0.05),
+        'in1/gnd': SimulatedChannel(1.0, drift=10.0),
+        'in2/gnd': SimulatedChannel(1.0),
+        'in3/gnd': SimulatedChannel(1.25)
+    }
+    sensor = gas.Mics6814(heater_pin=None, adc=SimulatedADS1015(channels, realtime=False, seed=1))
+    statistics = sensor.read_statistics(samples=64)
+    assert statistics.stddev.oxidising > 0
+    assert statistics.stddev.nh3 == pytest.approx(0, abs=1e-6)
+    reducing = sensor.read_reducing()
+    time.sleep(0.02)
+    assert sensor.read_reducing() > reducing
+
+    sensor.enable_adc(True)
+    sensor.set_adc_gain(2.048)
+    assert sensor.read_adc() == pytest.approx(1.25, abs=0.001)
+    assert sensor.adc.get_programmable_gain() == gas.MICS6814_GAIN
+
+
+def test_simulated_latency(GPIO):
+    import time
+    from enviroplus import gas
+    from enviroplus.gassimulator import SimulatedADS1015
+
+    sensor = gas.Mics6814(heater_pin=None, adc=SimulatedADS1015(transfer_time=0.001))
+    t_start = time.time()
+    sensor.read_nh3()
+    # Multiplexer, start, conversion register and gain transfers plus one conversion
+    assert time.time() - t_start >= 0.004
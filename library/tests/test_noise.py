@@ -1,48 +1,226 @@
-import pytest
-
-
-def test_noise_setup(sounddevice, numpy):
-    from enviroplus.noise import Noise
-
-    noise = Noise(sample_rate=16000, duration=0.1)
-    del noise
-
-
-def test_noise_get_amplitudes_at_frequency_ranges(sounddevice, numpy):
-    from enviroplus.noise import Noise
-
-    noise = Noise(sample_rate=16000, duration=0.1)
-    noise.get_amplitudes_at_frequency_ranges([
-        (100, 500),
-        (501, 1000)
-    ])
-
-    sounddevice.rec.assert_called_with(0.1 * 16000, samplerate=16000, blocking=True, channels=1, dtype='float64')
-
-
-def test_noise_get_noise_profile(sounddevice, numpy):
-    from enviroplus.noise import Noise
-
-    numpy.mean.return_value = 10.0
-
-    noise = Noise(sample_rate=16000, duration=0.1)
-    amp_low, amp_mid, amp_high, amp_total = noise.get_noise_profile(
-        noise_floor=100,
-        low=0.12,
-        mid=0.36,
-        high=None)
-
-    sounddevice.rec.assert_called_with(0.1 * 16000, samplerate=16000, blocking=True, channels=1, dtype='float64')
-
-    assert amp_total == 10.0
-
-
-def test_get_amplitude_at_frequency_range(sounddevice, numpy):
-    from enviroplus.noise import Noise
-
-    noise = Noise(sample_rate=16000, duration=0.1)
-
-    noise.get_amplitude_at_frequency_range(0, 8000)
-
-    with pytest.raises(ValueError):
-        noise.get_amplitude_at_frequency_range(0, 16000)
+import pytest
+import mock
+
+
+def test_noise_setup(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.1)
+    del noise
+
+
+def test_noise_get_amplitudes_at_frequency_ranges(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.1)
+    noise.get_amplitudes_at_frequency_ranges([
+        (100, 500),
+        (501, 1000)
+    ])
+
+    sounddevice.rec.assert_called_with(samplerate=16000, blocking=True, out=noise._recording)
+    numpy.zeros.assert_any_call((1600, 1), dtype='float32')
+
+
+def test_noise_get_noise_profile(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    numpy.mean.return_value = 10.0
+
+    noise = Noise(sample_rate=16000, duration=0.1)
+    amp_low, amp_mid, amp_high, amp_total = noise.get_noise_profile(
+        noise_floor=100,
+        low=0.12,
+        mid=0.36,
+        high=None)
+
+    sounddevice.rec.assert_called_with(samplerate=16000, blocking=True, out=noise._recording)
+    numpy.zeros.assert_any_call((1600, 1), dtype='float32')
+
+    assert amp_total == 10.0
+
+
+def test_get_amplitude_at_frequency_range(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.1)
+
+    noise.get_amplitude_at_frequency_range(0, 8000)
+
+    with pytest.raises(ValueError):
+        noise.get_amplitude_at_frequency_range(0, 16000)
+
+
+def test_noise_stream(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.1, stream=True)
+
+    callback = sounddevice.InputStream.call_args[1]['callback']
+    sounddevice.InputStream.return_value.start.assert_called_once()
+
+    # Fill the ring buffer in blocks that straddle the wrap-around point
+    for _ in range(3):
+        callback(mock.MagicMock(), 700, None, None)
+
+    noise.get_noise_profile()
+    sounddevice.rec.assert_not_called()
+
+    noise.stop_stream()
+    sounddevice.InputStream.return_value.stop.assert_called_once()
+    sounddevice.InputStream.return_value.close.assert_called_once()
+
+
+def test_noise_capture_spectrum(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    numpy.mean.return_value = 10.0
+    numpy.argmax.return_value = 5
+
+    noise = Noise(sample_rate=16000, duration=0.1)
+    numpy.fft.rfft.reset_mock()
+    spectrum = noise.capture_spectrum()
+
+    spectrum.get_amplitudes_at_frequency_ranges([(100, 500), (501, 1000)])
+    assert spectrum.get_noise_profile()[3] == 10.0
+    spectrum.get_peak(100, 1000)
+
+    with pytest.raises(ValueError):
+        spectrum.get_amplitude_at_frequency_range(0, 16000)
+
+    # A single capture and transform answers every query
+    assert sounddevice.rec.call_count == 1
+    assert numpy.fft.rfft.call_count == 1
+
+
+def test_spectrum_band_means_match_slices(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Spectrum
+
+    magnitude = numpy.abs(numpy.fft.rfft(numpy.random.RandomState(0).randn(800), n=1600))
+    spectrum = Spectrum(magnitude, 1600)
+
+    ranges = [(0, 10), (100, 500), (501, 1000), (795, 801), (790, 2000), (-50, -10), (20, 20), (30, 10)]
+    expected = [numpy.mean(magnitude[start:end]) for start, end in ranges[:-2]]
+
+    with pytest.warns(RuntimeWarning):
+        expected += [numpy.mean(magnitude[start:end]) for start, end in ranges[-2:]]
+
+    numpy.testing.assert_allclose(spectrum.get_amplitudes_at_frequency_ranges(ranges), expected)
+    assert spectrum.get_amplitude_at_frequency_range(100, 500) == pytest.approx(expected[1])
+
+
+def test_noise_fft_size(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.5)
+    assert noise.fft_size == 8192
+
+    noise.capture_spectrum()
+    assert numpy.fft.rfft.call_args[1]['n'] == 8192
+
+    noise = Noise(sample_rate=16000, duration=0.5, fft_size=16000)
+    assert noise.fft_size == 16000
+
+    with pytest.raises(ValueError):
+        Noise(fft_size=0)
+
+
+def test_spectrum_frequencies_map_to_bins(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Spectrum
+
+    signal = numpy.sin(2 * numpy.pi * 1000 * numpy.arange(8000) / 16000.0)
+    magnitude = numpy.abs(numpy.fft.rfft(signal, n=8192))
+    spectrum = Spectrum(magnitude, 16000, 8192)
+
+    frequency, _ = spectrum.get_peak()
+    assert abs(frequency - 1000) < spectrum.bin_width
+
+    tone, quiet = spectrum.get_amplitudes_at_frequency_ranges([(900, 1100), (4000, 5000)])
+    assert tone > quiet * 10
+    assert tone == pytest.approx(numpy.mean(magnitude[461:563]))
+
+
+def test_noise_welch_setup(sounddevice, numpy):
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=16000, duration=0.5, segment_size=1024)
+    assert noise.fft_size == 1024
+    assert noise.hop_size == 512
+    numpy.hanning.assert_called_once_with(1024)
+
+    noise.capture_spectrum()
+    assert numpy.fft.rfft.call_args[1]['axis'] == -1
+
+    with pytest.raises(ValueError):
+        Noise(sample_rate=16000, duration=0.5, segment_size=16000)
+
+    with pytest.raises(ValueError):
+        Noise(sample_rate=16000, duration=0.5, segment_size=1024, window='square')
+
+
+def test_noise_welch_reduces_variance():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.audio import SyntheticSource
+    from enviroplus.noise import Noise
+
+    def spread(**options):
+        source = SyntheticSource(tones=(), noise=1.0, seed=1)
+        noise = Noise(sample_rate=16000, duration=0.5, source=source, **options)
+        magnitude = noise.capture_spectrum().magnitude[10:-10]
+        return numpy.std(magnitude) / numpy.mean(magnitude)
+
+    # White noise has a flat spectrum, so the spread across bins is estimator variance
+    assert spread(segment_size=512) < spread() / 3
+
+
+def test_noise_reuses_buffers(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Noise
+
+    signal = numpy.random.RandomState(2).randn(8000, 1)
+
+    def record(out, **kwargs):
+        out[:] = signal
+        return out
+
+    sounddevice.rec.side_effect = record
+
+    for options in ({}, {'segment_size': 1024}):
+        reference = Noise(sample_rate=16000, duration=0.5, dtype='float64', **options).capture_spectrum()
+
+        noise = Noise(sample_rate=16000, duration=0.5, **options)
+        spectrum = noise.capture_spectrum()
+        magnitude = spectrum.magnitude
+        assert magnitude.dtype == numpy.float32
+
+        assert noise.capture_spectrum(out=spectrum) is spectrum
+        assert spectrum.magnitude is magnitude
+        assert sounddevice.rec.call_args[1]['out'] is noise._recording
+
+        numpy.testing.assert_allclose(magnitude, reference.magnitude, rtol=1e-3, atol=1e-3)
+        assert noise.get_noise_profile() == pytest.approx(reference.get_noise_profile(), rel=1e-4)
+
+
+def test_noise_read_samples_stream(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Noise
+
+    noise = Noise(sample_rate=10, duration=1.0, stream=True)
+    callback = sounddevice.InputStream.call_args[1]['callback']
+    audio = numpy.arange(40, dtype='float32').reshape(-1, 1)
+
+    callback(audio[:14], 14, None, None)
+    samples, position = noise.read_samples()
+    assert list(samples) == list(range(4, 14))
+
+    callback(audio[14:17], 3, None, None)
+    samples, position = noise.read_samples(position)
+    assert list(samples) == [14, 15, 16]
+
+    # Audio older than the ring buffer is lost
+    callback(audio[17:40], 23, None, None)
+    samples, position = noise.read_samples(position)
+    assert list(samples) == list(range(30, 40))
+    assert position == 40
@@ -0,0 +1,66 @@
+import pytest
+
+
+def test_level_histogram_percentiles():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noisestats import LevelHistogram
+
+    histogram = LevelHistogram(minimum=0.0, maximum=100.0, resolution=0.1, channels=2)
+    assert numpy.isnan(histogram.percentile(0.5)).all()
+
+    levels = numpy.column_stack((numpy.linspace(0, 100, 10001), numpy.full(10001, 50.0)))
+    for chunk in numpy.array_split(levels, 10):
+        histogram.add(chunk)
+    histogram.add([150.0, -10.0])
+
+    assert histogram.count == 10002
+    numpy.testing.assert_allclose(histogram.percentile(0.1), [10.0, 50.0], atol=0.1)
+    numpy.testing.assert_allclose(histogram.percentile(0.9), [90.0, 50.0], atol=0.1)
+    numpy.testing.assert_allclose(histogram.maximum, [150.0, 50.0])
+
+    histogram.reset()
+    assert histogram.count == 0
+
+
+def test_noise_statistics_intervals():
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noisestats import NoiseStatistics
+
+    statistics = NoiseStatistics(interval=3600.0)
+    # One reading a second for an hour, spread evenly in dB between amplitudes 1 and 100
+    for second, exponent in enumerate(numpy.linspace(0, 2, 3600)):
+        assert statistics.add([10 ** exponent] * 4, timestamp=7200.0 + second) is None
+
+    memory = statistics._histogram._counts.nbytes
+
+    result = statistics.add([1, 1, 1, 1], timestamp=10800.0)
+    assert result.start == 7200.0
+    assert result.end == 10800.0
+    assert result.count == 3600
+    assert result.levels['L90'] == pytest.approx([10 ** 0.2] * 4, rel=0.01)
+    assert result.levels['L50'] == pytest.approx([10 ** 1.0] * 4, rel=0.01)
+    assert result.levels['L10'] == pytest.approx([10 ** 1.8] * 4, rel=0.01)
+    assert "L10" in str(result)
+
+    assert statistics.get_statistics().count == 1
+    assert statistics._histogram._counts.nbytes == memory
+
+    with pytest.raises(ValueError):
+        statistics.add([1, 1], timestamp=10801.0)
+
+
+def test_noise_statistics_decibels():
+    pytest.importorskip('numpy')
+    from enviroplus.noisestats import NoiseStatistics
+
+    statistics = NoiseStatistics(interval=60.0, exceedances=(10, 90), scale='decibel')
+    for second in range(60):
+        statistics.add(40.0 if second < 30 else 60.0, timestamp=second)
+
+    result = statistics.get_statistics()
+    assert result.levels['L10'] == pytest.approx([60.0], abs=0.1)
+    assert result.levels['L90'] == pytest.approx([40.0], abs=0.1)
+    assert result.maximum == [60.0]
+
+    with pytest.raises(ValueError):
+        NoiseStatistics(scale='linear')
@@ -1,3 +1,7 @@
+import mock
+import pytest
+
+
 def test_gas_setup(GPIO, smbus):
     from enviroplus import gas
     gas._is_setup = False
@@ -64,3 +68,267 @@ def test_gas_cleanup(GPIO, smbus):
     gas.cleanup()
 
     GPIO.output.assert_called_with(gas.MICS6814_HEATER_PIN, 0)
+
+
+def test_gas_read_channels(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.adc.get_voltage = mock.Mock(wraps=gas.adc.get_voltage)
+    result = gas.read(['nh3'])
+    gas.adc.get_voltage.assert_called_once_with('in2/gnd')
+    assert int(result.nh3) == 16813
+    assert result.oxidising is None
+    assert result.reducing is None
+    assert result.adc is None
+    assert str(result).startswith("NH3")
+
+    with pytest.raises(ValueError):
+        gas.read(['co2'])
+
+
+def test_gas_read_single_channel(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.adc.get_voltage = mock.Mock(wraps=gas.adc.get_voltage)
+    assert int(gas.read_reducing()) == 16727
+    gas.adc.get_voltage.assert_called_once_with('in1/gnd')
+
+    gas.enable_adc(False)
+    assert gas.read_adc() is None
+
+
+def test_gas_adc_schedule(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.enable_adc(True)
+    gas.set_adc_gain(2.048)
+    gas.set_adc_schedule(interval=3)
+    gas.adc.get_voltage = mock.Mock(wraps=gas.adc.get_voltage)
+
+    readings = [gas.read_all() for _ in range(6)]
+    assert gas.adc.get_voltage.call_args_list.count(mock.call('ref/gnd')) == 2
+    assert [reading.adc for reading in readings] == [0.255] * 6
+    gas.enable_adc(False)
+
+
+def test_gas_adc_settle_time(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.enable_adc(True)
+    gas.set_adc_gain(2.048)
+    with mock.patch('time.sleep') as sleep:
+        gas.read_adc()
+    sleep.assert_called_once_with(gas.ADC_SETTLE_CONVERSIONS / float(gas.MICS6814_SAMPLE_RATE))
+    gas.enable_adc(False)
+
+
+def test_gas_sampler(GPIO, smbus):
+    import time
+    from enviroplus import gas
+    gas._is_setup = False
+
+    gas.start_sampler(rate_hz=200, history=100)
+    try:
+        with pytest.raises(RuntimeError):
+            gas.start_sampler()
+        first = gas.read_all()
+        assert int(first.oxidising) == 16641
+        assert first.timestamp is not None
+        assert int(gas.read_nh3()) == 16813
+
+        time.sleep(0.05)
+        latest = gas.read_all()
+        assert latest.timestamp > first.timestamp
+        assert 1 < len(gas._default._history) <= 100
+
+        average = gas.read_all(window=1.0)
+        assert average.timestamp >= latest.timestamp
+        assert int(average.reducing) == 16727
+        assert average.adc is None
+    finally:
+        gas.stop_sampler()
+
+    assert gas._default._sampler is None
+    assert gas.read_all().timestamp is not None
+
+
+def test_gas_read_batch(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+
+    batch = gas.read_batch(4, interval=0)
+    assert len(batch) == 4
+    assert [int(value) for value in batch.nh3] == [16813] * 4
+    assert batch.adc.typecode == 'd'
+    assert list(batch.timestamp) == sorted(batch.timestamp)
+
+    reading = batch[-1]
+    assert int(reading.oxidising) == 16641
+    assert reading.adc is None
+    assert reading.timestamp == batch.timestamp[3]
+    assert reading.heater_time == batch.heater_time[3]
+
+    head = batch[:2]
+    assert isinstance(head, gas.Mics6814Batch)
+    assert len(head) == 2
+    assert "2 readings" in str(head)
+    assert [r.reducing for r in head] == list(batch.reducing[:2])
+
+
+def test_gas_batch_from_readings(GPIO):
+    from enviroplus import gas
+
+    batch = gas.Mics6814Batch.from_readings([
+        gas.Mics6814Reading(1.0, 2.0, 3.0, 0.5, timestamp=10.0),
+        gas.Mics6814Reading(4.0, 5.0, 6.0, timestamp=11.0)])
+    assert list(batch.oxidising) == [1.0, 4.0]
+    assert batch[0].adc == 0.5
+    assert batch[1].adc is None
+    assert str(gas.Mics6814Batch()) == "Mics6814Batch: 0 readings"
+
+
+def test_gas_batch_numpy_view(GPIO):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus import gas
+
+    batch = gas.Mics6814Batch(timestamp=[0.0, 1.0], nh3=[100.0, 200.0])
+    view = numpy.asarray(batch.nh3)
+    batch.nh3[0] = 150.0
+    assert view[0] == 150.0
+
+
+def test_gas_heater_state(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+
+    assert gas.get_state() == gas.STATE_OFF
+    assert gas.get_heater_time() is None
+
+    gas.setup()
+    assert gas.get_state() == gas.STATE_WARMING_UP
+    assert gas.read_all().heater_time < gas.MICS6814_WARMUP_TIME
+
+    gas._default._heater_on -= gas.MICS6814_WARMUP_TIME
+    assert gas.get_state() == gas.STATE_STABLE
+    assert gas.get_state(warmup_time=3600) == gas.STATE_WARMING_UP
+    assert gas.read_all().heater_time >= gas.MICS6814_WARMUP_TIME
+
+    gas.cleanup()
+    assert gas.get_state() == gas.STATE_OFF
+
+
+def test_gas_duty_cycle(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+
+    readings = list(gas.duty_cycle(interval=0.1, heater_time=0.05, samples=2, count=2))
+    assert len(readings) == 2
+    for reading in readings:
+        assert 0.05 <= reading.heater_time < 0.1
+    assert readings[1].timestamp - readings[0].timestamp >= 0.09
+    assert gas.get_state() == gas.STATE_OFF
+    GPIO.output.assert_called_with(gas.MICS6814_HEATER_PIN, 0)
+
+    with pytest.raises(ValueError):
+        next(gas.duty_cycle(interval=10, heater_time=60))
+
+
+def test_gas_set_heater(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+
+    gas.set_heater(True)
+    heater_on = gas._default._heater_on
+    gas.set_heater(True)
+    assert gas._default._heater_on == heater_on
+    gas.set_heater(False)
+    assert gas.get_heater_time() is None
+
+
+def test_gas_read_all_oversampled(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    # 1000 / 2048 * 6.144 = 3.0V
+    gas.adc.get_conversion_value = mock.Mock(return_value=1000)
+    result = gas.read_all(samples=8)
+    assert round(result.oxidising) == 560000
+    assert round(result.reducing) == 560000
+    assert round(result.nh3) == 560000
+    assert gas.adc.get_mode() == 'single'
+
+
+def test_gas_read_statistics(GPIO, smbus):
+    from enviroplus import gas
+    gas._is_setup = False
+    gas.setup()
+
+    gas.adc.get_conversion_value = mock.Mock(side_effect=[1000, 1000, 1000, 1000, 500, 1500] * 4)
+    gas.enable_adc(True)
+    gas.set_adc_gain(2.048)
+    result = gas.read_statistics(samples=6)
+    gas.enable_adc(False)
+
+    assert result.samples == 6
+    assert round(result.median.oxidising) == 560000
+    assert result.mean.adc == 1000 * 2.048 / 2048
+    assert round(result.stddev.adc, 3) == 0.316
+    assert gas.adc.get_programmable_gain() == gas.MICS6814_GAIN
+    assert "Median" in str(result)
+
+
+def test_gas_summarise(GPIO):
+    from enviroplus import gas
+
+    assert gas._summarise([1.0, 2.0, 3.0, 10.0]) == (4.0, 2.5, gas.math.sqrt(50 / 3.0))
+    assert gas._summarise([5.0]) == (5.0, 5.0, 0.0)
+
+
+def test_gas_multiple_devices(GPIO, smbus):
+    from enviroplus import gas
+
+    first = gas.Mics6814(i2c_addr=0x48, heater_pin=23)
+    second = gas.Mics6814(i2c_addr=0x49, heater_pin=24)
+    assert first.adc is not second.adc
+    GPIO.setup.assert_any_call(23, GPIO.OUT)
+
+    first.enable_adc(True)
+    first.set_adc_gain(2.048)
+    assert first.read_adc() == 0.255
+    assert second.read_adc() is None
+    assert int(second.read_nh3()) == 16813
+
+    first.cleanup()
+    GPIO.output.assert_called_with(23, 0)
+    assert first.get_state() == gas.STATE_OFF
+    assert second.get_state() == gas.STATE_WARMING_UP
+
+
+def test_gas_threads(GPIO, smbus):
+    import threading
+    from enviroplus import gas
+
+    sensor = gas.Mics6814()
+    results = []
+
+    def read():
+        for _ in range(20):
+            results.append(sensor.read_all(samples=2).nh3)
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 80
+    assert sensor.adc.get_mode() == 'single'
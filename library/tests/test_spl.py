@@ -0,0 +1,71 @@
+import pytest
+
+
+def tone(numpy, frequency, amplitude, duration, sample_rate=16000):
+    t = numpy.arange(int(duration * sample_rate)) / float(sample_rate)
+    return amplitude * numpy.sin(2 * numpy.pi * frequency * t)
+
+
+def test_weighting_curves(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.spl import a_weighting, c_weighting
+
+    # Reference values from IEC 61672-1 table 3
+    numpy.testing.assert_allclose(a_weighting([100, 1000, 4000]), [-19.1, 0.0, 1.0], atol=0.1)
+    numpy.testing.assert_allclose(c_weighting([31.5, 1000, 8000]), [-3.0, 0.0, -3.0], atol=0.1)
+
+
+def test_spl_meter_full_scale_tone(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Noise
+    from enviroplus.spl import SPLMeter
+
+    meter = SPLMeter(Noise(sample_rate=16000, duration=0.5), weighting='A', period=1.0)
+
+    # A full scale sine has a mean square of 0.5, or -3.01 dBFS
+    assert meter.process(tone(numpy, 1000, 1.0, 0.5)) == []
+    assert meter.get_level() == pytest.approx(-3.01, abs=0.05)
+
+    levels, = meter.process(tone(numpy, 1000, 1.0, 0.5))
+    assert levels.leq == pytest.approx(-3.01, abs=0.05)
+    assert levels.duration == pytest.approx(1.0)
+    assert meter.get_levels() is None
+    assert "Leq" in str(levels)
+
+
+def test_spl_meter_statistics(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Noise
+    from enviroplus.spl import SPLMeter
+
+    meter = SPLMeter(Noise(sample_rate=16000, duration=0.5), period=10.0, calibration_offset=100.0)
+
+    # 2s loud, 8s quiet, fed in uneven chunks that straddle block boundaries
+    signal = numpy.concatenate((tone(numpy, 1000, 1.0, 2.0), tone(numpy, 1000, 0.01, 8.0)))
+    completed = []
+    for chunk in numpy.array_split(signal, 7):
+        completed += meter.process(chunk)
+
+    levels, = completed
+    assert levels.lmax == pytest.approx(96.99, abs=0.1)
+    assert levels.l10 == pytest.approx(97.0, abs=0.2)
+    assert levels.l90 == pytest.approx(57.0, abs=0.2)
+    assert levels.leq == pytest.approx(10 * numpy.log10(0.2 * 0.5 + 0.8 * 0.00005) + 100, abs=0.05)
+
+
+def test_spl_meter_calibrate(sounddevice):
+    numpy = pytest.importorskip('numpy')
+    from enviroplus.noise import Noise
+    from enviroplus.spl import SPLMeter
+
+    sounddevice.rec.side_effect = lambda out, **kwargs: numpy.copyto(out[:, 0], tone(numpy, 1000, 0.1, 0.5)) or out
+
+    meter = SPLMeter(Noise(sample_rate=16000, duration=0.5))
+    assert meter.calibrate(94.0) == pytest.approx(94.0 + 23.01, abs=0.05)
+    assert meter.get_calibration_offset() == pytest.approx(117.01, abs=0.05)
+
+    meter.update()
+    assert meter.get_level() == pytest.approx(94.0, abs=0.05)
+
+    with pytest.raises(ValueError):
+        SPLMeter(Noise(sample_rate=16000, duration=0.5), weighting='B')